@@ -7,8 +7,17 @@ function authHeaders(token) {
   };
 }
 
-export async function fetchAdminUsers(token) {
-  const res = await fetch(`${API_BASE}/admin/users`, { headers: authHeaders(token) });
+/** One page of users: `{ users, nextCursor, counts? }` (counts only with `withCounts` on the first page). */
+export async function fetchAdminUsers(token, { cursor, limit, status, q, minDonation, withCounts } = {}) {
+  const params = new URLSearchParams();
+  if (cursor) params.set('cursor', cursor);
+  else if (withCounts) params.set('withCounts', '1');
+  if (limit) params.set('limit', String(limit));
+  if (status) params.set('status', status);
+  if (q) params.set('q', q);
+  if (minDonation) params.set('minDonation', String(minDonation));
+  const qs = params.toString();
+  const res = await fetch(`${API_BASE}/admin/users${qs ? `?${qs}` : ''}`, { headers: authHeaders(token) });
   const data = await res.json().catch(() => ({}));
   if (!res.ok) throw new Error(data.error || 'Failed to load users');
   return data;
@@ -21,6 +30,15 @@ export async function fetchAdminUserDetail(token, userId) {
   return data.user;
 }
 
+export async function fetchAdminUserPayments(token, userId, cursor) {
+  const res = await fetch(`${API_BASE}/admin/users/${userId}/payments?cursor=${encodeURIComponent(cursor)}`, {
+    headers: authHeaders(token),
+  });
+  const data = await res.json().catch(() => ({}));
+  if (!res.ok) throw new Error(data.error || 'Failed to load payments');
+  return data;
+}
+
 export async function fetchAdminStats(token) {
   const res = await fetch(`${API_BASE}/admin/stats`, { headers: authHeaders(token) });
   const data = await res.json().catch(() => ({}));
@@ -28,6 +46,40 @@ export async function fetchAdminStats(token) {
   return data.stats;
 }
 
+/** Downloads the 80G donation export (`{ fy }` or `{ from, to }`, optional `format`, `taxExempt`). */
+export async function downloadDonationExport(token, { fy, from, to, format = 'csv', taxExempt } = {}) {
+  const params = new URLSearchParams({ format });
+  if (fy) params.set('fy', String(fy));
+  if (from) params.set('from', from);
+  if (to) params.set('to', to);
+  if (taxExempt != null) params.set('taxExempt', String(taxExempt));
+  const res = await fetch(`${API_BASE}/admin/exports/donations?${params}`, { headers: authHeaders(token) });
+  if (!res.ok) {
+    const data = await res.json().catch(() => ({}));
+    throw new Error(data.error || 'Export failed');
+  }
+  const blob = await res.blob();
+  const name = /filename="([^"]+)"/.exec(res.headers.get('Content-Disposition') || '')?.[1] || `donations.${format}`;
+  const url = URL.createObjectURL(blob);
+  const a = document.createElement('a');
+  a.href = url;
+  a.download = name;
+  a.click();
+  URL.revokeObjectURL(url);
+}
+
+/** Fans one message out to `audience` ({ status: 'all'|'complete'|'incomplete', minDonation }). */
+export async function broadcastAdminNotification(token, { message, audience }) {
+  const res = await fetch(`${API_BASE}/admin/notifications/broadcast`, {
+    method: 'POST',
+    headers: authHeaders(token),
+    body: JSON.stringify({ message, audience }),
+  });
+  const data = await res.json().catch(() => ({}));
+  if (!res.ok) throw new Error(data.error || 'Failed to broadcast');
+  return data;
+}
+
 export async function sendAdminNotification(token, { userId, message }) {
   const res = await fetch(`${API_BASE}/admin/notifications`, {
     method: 'POST',
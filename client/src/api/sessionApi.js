@@ -43,6 +43,15 @@ export async function fetchUserProfile(token) {
   return data.user;
 }
 
+export async function fetchUserPayments(token, cursor) {
+  const res = await fetch(`${API_BASE}/user/payments?cursor=${encodeURIComponent(cursor)}`, {
+    headers: authHeaders(token),
+  });
+  const data = await res.json().catch(() => ({}));
+  if (!res.ok) throw new Error(data.error || 'Failed to load payments');
+  return data;
+}
+
 export async function updateUserProfile(token, profileData) {
   const res = await fetch(`${API_BASE}/user/profile`, {
     method: 'PUT',
@@ -82,11 +91,77 @@ export async function recordPayment(token, { amount, razorpay_payment_id, tax_ex
   return data;
 }
 
-export async function fetchUserNotifications(token) {
-  const res = await fetch(`${API_BASE}/user/notifications`, { headers: authHeaders(token) });
+/** One newest-first page: `{ notifications, nextCursor }`. */
+export async function fetchUserNotifications(token, { cursor, limit, unread } = {}) {
+  const params = new URLSearchParams();
+  if (cursor) params.set('cursor', cursor);
+  if (limit) params.set('limit', String(limit));
+  if (unread) params.set('unread', '1');
+  const qs = params.toString();
+  const res = await fetch(`${API_BASE}/user/notifications${qs ? `?${qs}` : ''}`, { headers: authHeaders(token) });
   const data = await res.json().catch(() => ({}));
   if (!res.ok) throw new Error(data.error || 'Failed to load notifications');
-  return data.notifications || [];
+  return { notifications: data.notifications || [], nextCursor: data.nextCursor || null };
+}
+
+/** Bulk mark-read: `{ ids }` or `{ all: true }`. */
+export async function markNotificationsRead(token, { ids, all } = {}) {
+  const res = await fetch(`${API_BASE}/user/notifications/read`, {
+    method: 'PUT',
+    headers: authHeaders(token),
+    body: JSON.stringify(all ? { all: true } : { ids }),
+  });
+  const data = await res.json().catch(() => ({}));
+  if (!res.ok) throw new Error(data.error || 'Failed to update');
+  return data;
+}
+
+/**
+ * Subscribes to pushed notifications (server-sent events over fetch, so the token stays in the
+ * Authorization header). Reconnects after drops, resuming after the last id seen. Returns an unsubscribe fn.
+ */
+export function openNotificationStream(token, { after = 0, onNotification }) {
+  const controller = new AbortController();
+  let lastId = after;
+
+  (async () => {
+    while (!controller.signal.aborted) {
+      try {
+        const res = await fetch(`${API_BASE}/user/notifications/stream?after=${lastId}`, {
+          headers: authHeaders(token),
+          signal: controller.signal,
+        });
+        if (res.status === 401 || res.status === 403 || res.status === 404) return;
+        if (!res.ok || !res.body) throw new Error('Notification stream failed');
+        const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buf = '';
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buf += value;
+          let idx;
+          while ((idx = buf.indexOf('\n\n')) !== -1) {
+            const block = buf.slice(0, idx);
+            buf = buf.slice(idx + 2);
+            const data = block
+              .split('\n')
+              .filter((l) => l.startsWith('data: '))
+              .map((l) => l.slice(6))
+              .join('\n');
+            if (!data) continue;
+            const n = JSON.parse(data);
+            if (n.id > lastId) lastId = n.id;
+            onNotification(n);
+          }
+        }
+      } catch {
+        if (controller.signal.aborted) return;
+      }
+      await new Promise((r) => setTimeout(r, 5000));
+    }
+  })();
+
+  return () => controller.abort();
 }
 
 export async function markNotificationRead(token, id) {
@@ -23,6 +23,7 @@ function formatCurrency(n) {
 export default function ProfileModals({ open, onClose }) {
   const {
     fetchUserProfile,
+    fetchMorePayments,
     updateUserProfile,
     submitKYC,
     logout,
@@ -63,7 +64,8 @@ export default function ProfileModals({ open, onClose }) {
 
   const showEditProfile = Boolean(user) && !Boolean(user.profileComplete);
   const payments = Array.isArray(user?.payments) ? user.payments : [];
-  const paymentSummary = payments.reduce(
+  // Server summary covers the whole history; the local fallback only sees loaded pages.
+  const paymentSummary = user?.paymentSummary || payments.reduce(
     (acc, p) => {
       const status = String(p.status || 'success').toLowerCase();
       const amt = amountValue(p.amount);
@@ -95,6 +97,20 @@ export default function ProfileModals({ open, onClose }) {
       standardCount: 0,
     }
   );
+  const loadMorePayments = async () => {
+    if (!user?.paymentsNextCursor) return;
+    try {
+      const page = await fetchMorePayments(user.paymentsNextCursor);
+      setUser((prev) => ({
+        ...prev,
+        payments: [...(prev.payments || []), ...(page.payments || [])],
+        paymentsNextCursor: page.nextCursor,
+      }));
+    } catch {
+      /* ignore */
+    }
+  };
+
   const groupedPayments = payments.reduce((acc, p) => {
     const status = String(p.status || 'success').toLowerCase();
     const key = status === 'success' || status === 'failed' || status === 'pending' ? status : 'other';
@@ -305,6 +321,11 @@ export default function ProfileModals({ open, onClose }) {
                         ))}
                       </div>
                     ))}
+                    {user.paymentsNextCursor ? (
+                      <button type="button" className="btn-secondary" onClick={loadMorePayments}>
+                        Load older donations
+                      </button>
+                    ) : null}
                   </div>
                 )}
 
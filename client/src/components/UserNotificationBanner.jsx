@@ -12,22 +12,38 @@ export default function UserNotificationBanner() {
       return undefined;
     }
     let cancelled = false;
+    let unsubscribe = null;
     (async () => {
+      let after = 0;
       try {
-        const list = await api.fetchUserNotifications(token);
-        if (!cancelled) setItems(Array.isArray(list) ? list : []);
+        const { notifications } = await api.fetchUserNotifications(token, { unread: true, limit: 20 });
+        if (cancelled) return;
+        setItems(notifications);
+        after = notifications.reduce((max, n) => Math.max(max, n.id), 0);
       } catch {
         if (!cancelled) setItems([]);
       }
+      if (cancelled) return;
+      unsubscribe = api.openNotificationStream(token, {
+        after,
+        onNotification: (n) =>
+          setItems((prev) => (prev.some((x) => x.id === n.id) ? prev : [n, ...prev])),
+      });
     })();
     return () => {
       cancelled = true;
+      if (unsubscribe) unsubscribe();
     };
   }, [isLoggedIn, token]);
 
   const unread = items.filter((n) => !n.read_at);
   if (unread.length === 0) return null;
 
+  const markRead = (ids) => {
+    const now = new Date().toISOString();
+    setItems((prev) => prev.map((x) => (ids.includes(x.id) ? { ...x, read_at: now } : x)));
+  };
+
   return (
     <div className="user-notification-stack" role="region" aria-label="Messages from Swagatham">
       {unread.map((n) => (
@@ -39,9 +55,7 @@ export default function UserNotificationBanner() {
             onClick={async () => {
               try {
                 await api.markNotificationRead(token, n.id);
-                setItems((prev) =>
-                  prev.map((x) => (x.id === n.id ? { ...x, read_at: new Date().toISOString() } : x))
-                );
+                markRead([n.id]);
               } catch {
                 /* ignore */
               }
@@ -51,6 +65,22 @@ export default function UserNotificationBanner() {
           </button>
         </div>
       ))}
+      {unread.length > 1 ? (
+        <button
+          type="button"
+          className="user-notification-dismiss"
+          onClick={async () => {
+            try {
+              await api.markNotificationsRead(token, { all: true });
+              markRead(unread.map((n) => n.id));
+            } catch {
+              /* ignore */
+            }
+          }}
+        >
+          Dismiss all
+        </button>
+      ) : null}
     </div>
   );
 }
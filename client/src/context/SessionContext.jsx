@@ -83,6 +83,14 @@ export function SessionProvider({ children }) {
     }
   }, [token, logout]);
 
+  const fetchMorePayments = useCallback(
+    async (cursor) => {
+      if (!token) throw new Error('Not authenticated');
+      return api.fetchUserPayments(token, cursor);
+    },
+    [token]
+  );
+
   const updateUserProfile = useCallback(
     async (profileData) => {
       if (!token) return false;
@@ -122,6 +130,7 @@ export function SessionProvider({ children }) {
       login,
       logout,
       fetchUserProfile,
+      fetchMorePayments,
       updateUserProfile,
       submitKYC,
       recordPayment,
@@ -137,6 +146,7 @@ export function SessionProvider({ children }) {
       login,
       logout,
       fetchUserProfile,
+      fetchMorePayments,
       updateUserProfile,
       submitKYC,
       recordPayment,
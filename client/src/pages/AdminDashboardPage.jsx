@@ -3,33 +3,45 @@ import { useNavigate } from 'react-router-dom';
 import * as adminApi from '../api/adminApi';
 import { useAdmin } from '../context/AdminContext';
 
+const PAGE_SIZE = 50;
+
+// Indian financial year (Apr–Mar) that contains today.
+function currentFinancialYear() {
+  const now = new Date();
+  return now.getMonth() >= 3 ? now.getFullYear() : now.getFullYear() - 1;
+}
+const EMPTY_LIST = { items: [], nextCursor: null, total: 0 };
+
 export default function AdminDashboardPage() {
   const navigate = useNavigate();
   const { adminToken, adminLogout, isAdminLoggedIn } = useAdmin();
   const [stats, setStats] = useState(null);
-  const [users, setUsers] = useState([]);
-  const [incomplete, setIncomplete] = useState([]);
-  const [complete, setComplete] = useState([]);
+  const [incomplete, setIncomplete] = useState(EMPTY_LIST);
+  const [complete, setComplete] = useState(EMPTY_LIST);
+  const [search, setSearch] = useState('');
+  const [query, setQuery] = useState('');
   const [detail, setDetail] = useState(null);
   const [loading, setLoading] = useState(true);
   const [err, setErr] = useState('');
   const [notifyUserId, setNotifyUserId] = useState('');
   const [notifyMessage, setNotifyMessage] = useState('Please complete your profile information.');
   const [notifyBusy, setNotifyBusy] = useState(false);
+  const [exportFy, setExportFy] = useState(currentFinancialYear);
+  const [exportBusy, setExportBusy] = useState(false);
 
   const load = useCallback(async () => {
     if (!adminToken) return;
     setLoading(true);
     setErr('');
     try {
-      const [s, u] = await Promise.all([
+      const [s, inc, comp] = await Promise.all([
         adminApi.fetchAdminStats(adminToken),
-        adminApi.fetchAdminUsers(adminToken),
+        adminApi.fetchAdminUsers(adminToken, { status: 'incomplete', q: query, limit: PAGE_SIZE, withCounts: true }),
+        adminApi.fetchAdminUsers(adminToken, { status: 'complete', q: query, limit: PAGE_SIZE }),
       ]);
       setStats(s);
-      setUsers(u.users || []);
-      setIncomplete(u.incomplete || []);
-      setComplete(u.complete || []);
+      setIncomplete({ items: inc.users || [], nextCursor: inc.nextCursor, total: inc.counts?.incomplete ?? 0 });
+      setComplete({ items: comp.users || [], nextCursor: comp.nextCursor, total: inc.counts?.complete ?? 0 });
     } catch (e) {
       setErr(e.message || 'Failed to load');
       if (e.message?.includes('403') || e.message?.includes('401')) {
@@ -39,7 +51,25 @@ export default function AdminDashboardPage() {
     } finally {
       setLoading(false);
     }
-  }, [adminToken, adminLogout, navigate]);
+  }, [adminToken, adminLogout, navigate, query]);
+
+  const loadMore = async (status) => {
+    const [list, setList] = status === 'complete' ? [complete, setComplete] : [incomplete, setIncomplete];
+    if (!adminToken || !list.nextCursor) return;
+    try {
+      const page = await adminApi.fetchAdminUsers(adminToken, {
+        status,
+        q: query,
+        cursor: list.nextCursor,
+        limit: PAGE_SIZE,
+      });
+      setList((prev) => ({ ...prev, items: [...prev.items, ...(page.users || [])], nextCursor: page.nextCursor }));
+    } catch (e) {
+      alert(e.message);
+    }
+  };
+
+  const users = [...incomplete.items, ...complete.items];
 
   useEffect(() => {
     if (!isAdminLoggedIn) {
@@ -59,6 +89,31 @@ export default function AdminDashboardPage() {
     }
   };
 
+  const loadMoreDetailPayments = async () => {
+    if (!adminToken || !detail?.paymentsNextCursor) return;
+    try {
+      const page = await adminApi.fetchAdminUserPayments(adminToken, detail.id, detail.paymentsNextCursor);
+      setDetail((prev) => ({
+        ...prev,
+        payments: [...(prev.payments || []), ...(page.payments || [])],
+        paymentsNextCursor: page.nextCursor,
+      }));
+    } catch (e) {
+      alert(e.message);
+    }
+  };
+
+  const exportDonations = async () => {
+    setExportBusy(true);
+    try {
+      await adminApi.downloadDonationExport(adminToken, { fy: exportFy, taxExempt: true });
+    } catch (e) {
+      alert(e.message || 'Export failed');
+    } finally {
+      setExportBusy(false);
+    }
+  };
+
   const sendNotification = async () => {
     const uid = parseInt(notifyUserId, 10);
     if (!uid || !notifyMessage.trim()) {
@@ -77,6 +132,25 @@ export default function AdminDashboardPage() {
     }
   };
 
+  const broadcastToIncomplete = async () => {
+    if (!notifyMessage.trim()) {
+      alert('Enter a message');
+      return;
+    }
+    setNotifyBusy(true);
+    try {
+      const r = await adminApi.broadcastAdminNotification(adminToken, {
+        message: notifyMessage.trim(),
+        audience: { status: 'incomplete' },
+      });
+      alert(`Notification sent to ${r.recipients} users`);
+    } catch (e) {
+      alert(e.message || 'Failed');
+    } finally {
+      setNotifyBusy(false);
+    }
+  };
+
   if (!isAdminLoggedIn) return null;
 
   return (
@@ -119,7 +193,27 @@ export default function AdminDashboardPage() {
       ) : null}
 
       <section className="admin-notify-section">
-        <h2>Send notification to a user</h2>
+        <h2>80G donation export</h2>
+        <p className="admin-help">CSV of tax-exempt donations with donor details and PAN for the financial year.</p>
+        <div className="admin-notify-row">
+          <select value={exportFy} onChange={(e) => setExportFy(Number(e.target.value))} aria-label="Financial year">
+            {[0, 1, 2, 3].map((i) => {
+              const fy = currentFinancialYear() - i;
+              return (
+                <option key={fy} value={fy}>
+                  FY {fy}–{String(fy + 1).slice(2)}
+                </option>
+              );
+            })}
+          </select>
+          <button type="button" className="btn-primary" disabled={exportBusy} onClick={exportDonations}>
+            {exportBusy ? 'Exporting…' : 'Download CSV'}
+          </button>
+        </div>
+      </section>
+
+      <section className="admin-notify-section">
+        <h2>Send notification</h2>
         <p className="admin-help">Message appears as a banner when the user visits the site (logged in).</p>
         <div className="admin-notify-row">
           <select
@@ -143,14 +237,36 @@ export default function AdminDashboardPage() {
           <button type="button" className="btn-primary" disabled={notifyBusy} onClick={sendNotification}>
             {notifyBusy ? 'Sending…' : 'Send'}
           </button>
+          <button type="button" className="btn-secondary" disabled={notifyBusy} onClick={broadcastToIncomplete}>
+            Send to all incomplete profiles
+          </button>
         </div>
       </section>
 
+      <form
+        className="admin-notify-row"
+        onSubmit={(e) => {
+          e.preventDefault();
+          setQuery(search.trim());
+        }}
+      >
+        <input
+          type="search"
+          value={search}
+          onChange={(e) => setSearch(e.target.value)}
+          placeholder="Search by phone or name prefix"
+          aria-label="Search users"
+        />
+        <button type="submit" className="btn-secondary">
+          Search
+        </button>
+      </form>
+
       <div className="admin-columns">
         <section className="admin-user-list">
-          <h2>Incomplete profiles ({incomplete.length})</h2>
+          <h2>Incomplete profiles ({incomplete.total})</h2>
           <ul>
-            {incomplete.map((u) => (
+            {incomplete.items.map((u) => (
               <li key={u.id}>
                 <button type="button" className="admin-user-link" onClick={() => openUser(u.id)}>
                   {u.phone} {u.name || '—'}
@@ -158,11 +274,16 @@ export default function AdminDashboardPage() {
               </li>
             ))}
           </ul>
+          {incomplete.nextCursor ? (
+            <button type="button" className="btn-secondary" onClick={() => loadMore('incomplete')}>
+              Load more
+            </button>
+          ) : null}
         </section>
         <section className="admin-user-list">
-          <h2>Complete profiles ({complete.length})</h2>
+          <h2>Complete profiles ({complete.total})</h2>
           <ul>
-            {complete.map((u) => (
+            {complete.items.map((u) => (
               <li key={u.id}>
                 <button type="button" className="admin-user-link" onClick={() => openUser(u.id)}>
                   {u.phone} {u.name || '—'} · ₹{Number(u.total_paid || 0).toLocaleString('en-IN')}
@@ -170,6 +291,11 @@ export default function AdminDashboardPage() {
               </li>
             ))}
           </ul>
+          {complete.nextCursor ? (
+            <button type="button" className="btn-secondary" onClick={() => loadMore('complete')}>
+              Load more
+            </button>
+          ) : null}
         </section>
       </div>
 
@@ -202,6 +328,11 @@ export default function AdminDashboardPage() {
               ))}
             </ul>
             {detail.payments?.length === 0 ? <p>No payments</p> : null}
+            {detail.paymentsNextCursor ? (
+              <button type="button" className="btn-secondary" onClick={loadMoreDetailPayments}>
+                Load older payments
+              </button>
+            ) : null}
           </div>
         </div>
       ) : null}
@@ -234,8 +234,8 @@ export default function DonatePage() {
             await refreshProfileAfterPayment();
             const inv = rec.invoiceNo ? `<br/><strong>Invoice:</strong> ${rec.invoiceNo}` : '';
             const mail =
-              rec.receiptEmailSent === true
-                ? '<br/><em>A receipt has been sent to your email.</em>'
+              rec.receiptEmailQueued === true
+                ? '<br/><em>A receipt is on its way to your email.</em>'
                 : '<br/><small>Save this confirmation for your records. (Configure SMTP on the server to email receipts automatically.)</small>';
             setSuccessHtml(
               `Thank you for your donation of ₹${amt}!${inv}<br/><br/><strong>Payment ID:</strong> ${response.razorpay_payment_id}<br/><strong>Status:</strong> Recorded successfully${mail}`
@@ -0,0 +1,19 @@
+-- Shared OTP / rate-limit store (OTP_STORE=mysql). Run: mysql -u root -p swagatham_foundation < database/migrations/004_otp_store.sql
+
+USE swagatham_foundation;
+
+-- expires_at / reset_at are epoch milliseconds written by the API, independent of session time zone.
+CREATE TABLE IF NOT EXISTS otp_codes (
+  phone VARCHAR(20) NOT NULL PRIMARY KEY,
+  otp CHAR(6) NOT NULL,
+  attempts SMALLINT UNSIGNED NOT NULL DEFAULT 0,
+  expires_at BIGINT UNSIGNED NOT NULL,
+  INDEX idx_otp_expires (expires_at)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS otp_rate_limits (
+  bucket VARCHAR(64) NOT NULL PRIMARY KEY,
+  hits INT UNSIGNED NOT NULL DEFAULT 0,
+  reset_at BIGINT UNSIGNED NOT NULL,
+  INDEX idx_otp_rate_reset (reset_at)
+) ENGINE=InnoDB;
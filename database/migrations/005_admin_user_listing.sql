@@ -0,0 +1,30 @@
+-- Admin user listing: keyset indexes + per-user donation totals. Run: mysql -u root -p swagatham_foundation < database/migrations/005_admin_user_listing.sql
+
+USE swagatham_foundation;
+
+-- Maintained by POST /api/payment in the same transaction as the payments insert.
+-- No FK: avoids type mismatch between signed/unsigned users.id across installs.
+CREATE TABLE IF NOT EXISTS user_donation_totals (
+  user_id INT NOT NULL PRIMARY KEY,
+  payment_count INT UNSIGNED NOT NULL DEFAULT 0,
+  total_paid DECIMAL(14, 2) NOT NULL DEFAULT 0,
+  INDEX idx_totals_paid (total_paid)
+) ENGINE=InnoDB;
+
+ALTER TABLE users
+  ADD INDEX idx_users_created (created_at, id),
+  ADD INDEX idx_users_complete_created (profile_complete, created_at, id),
+  ADD INDEX idx_users_name (name);
+
+-- Covers the per-user COUNT/SUM so the backfill below never touches table rows.
+ALTER TABLE payments
+  ADD INDEX idx_payments_user_status_amount (user_id, status, amount);
+
+INSERT INTO user_donation_totals (user_id, payment_count, total_paid)
+SELECT user_id, COUNT(*), SUM(amount)
+FROM payments
+WHERE status = 'success'
+GROUP BY user_id
+ON DUPLICATE KEY UPDATE
+  payment_count = VALUES(payment_count),
+  total_paid = VALUES(total_paid);
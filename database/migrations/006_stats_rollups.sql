@@ -0,0 +1,19 @@
+-- Admin stats rollups. Run: mysql -u root -p swagatham_foundation < database/migrations/006_stats_rollups.sql
+-- Backfill afterwards (or any time the counts drift): npm run stats:rebuild
+
+USE swagatham_foundation;
+
+-- metric: 'donation' | 'signup'; period_type: 'all' (key '') | 'month' ('YYYY-MM') | 'day' ('YYYY-MM-DD').
+CREATE TABLE IF NOT EXISTS stats_rollups (
+  metric VARCHAR(16) NOT NULL,
+  period_type VARCHAR(8) NOT NULL,
+  period_key VARCHAR(10) NOT NULL,
+  tax_exempt TINYINT(1) NOT NULL DEFAULT 0,
+  event_count INT UNSIGNED NOT NULL DEFAULT 0,
+  amount DECIMAL(16, 2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (metric, period_type, period_key, tax_exempt)
+) ENGINE=InnoDB;
+
+-- Recent-payments list on the dashboard.
+ALTER TABLE payments
+  ADD INDEX idx_payments_status_date (status, payment_date);
@@ -0,0 +1,21 @@
+-- Receipt email outbox (emailOutbox.js). Run: mysql -u root -p swagatham_foundation < database/migrations/007_email_outbox.sql
+
+USE swagatham_foundation;
+
+-- status: pending → sending → sent, or back to pending with a later next_attempt_at; failed after max attempts.
+CREATE TABLE IF NOT EXISTS email_outbox (
+  id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+  kind VARCHAR(32) NOT NULL,
+  recipient VARCHAR(255) NOT NULL,
+  payload JSON NOT NULL,
+  status VARCHAR(16) NOT NULL DEFAULT 'pending',
+  attempts SMALLINT UNSIGNED NOT NULL DEFAULT 0,
+  next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  locked_by VARCHAR(96) NULL,
+  locked_at DATETIME NULL,
+  last_error TEXT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  sent_at DATETIME NULL,
+  INDEX idx_outbox_due (status, next_attempt_at),
+  INDEX idx_outbox_locked (locked_by)
+) ENGINE=InnoDB;
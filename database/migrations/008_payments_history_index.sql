@@ -0,0 +1,7 @@
+-- Paginated payment history on profile pages. Run: mysql -u root -p swagatham_foundation < database/migrations/008_payments_history_index.sql
+
+USE swagatham_foundation;
+
+-- Keyset (payment_date, id) per user; InnoDB appends id to the secondary index.
+ALTER TABLE payments
+  ADD INDEX idx_payments_user_date (user_id, payment_date);
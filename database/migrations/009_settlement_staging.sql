@@ -0,0 +1,19 @@
+-- Staging for Razorpay settlement reconciliation (scripts/reconcile_settlements.py).
+-- Run: mysql -u root -p swagatham_foundation < database/migrations/009_settlement_staging.sql
+
+USE swagatham_foundation;
+
+-- One row per settlement CSV line: file_no is the file's position in a multi-file run, line_no its CSV line.
+-- run_id scopes rows so concurrent or kept runs do not collide.
+-- (run_id, razorpay_payment_id) drives the join against payments.uk_razorpay_payment.
+CREATE TABLE IF NOT EXISTS settlement_staging (
+  run_id CHAR(32) NOT NULL,
+  file_no SMALLINT UNSIGNED NOT NULL,
+  line_no INT UNSIGNED NOT NULL,
+  razorpay_payment_id VARCHAR(255) NOT NULL,
+  amount DECIMAL(12, 2) NOT NULL,
+  settlement_id VARCHAR(64) NULL,
+  settled_at VARCHAR(32) NULL,
+  PRIMARY KEY (run_id, file_no, line_no),
+  INDEX idx_staging_payment (run_id, razorpay_payment_id)
+) ENGINE=InnoDB;
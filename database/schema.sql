@@ -18,7 +18,10 @@ CREATE TABLE IF NOT EXISTS users (
   profile_complete TINYINT(1) NOT NULL DEFAULT 0,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-  INDEX idx_users_phone (phone)
+  INDEX idx_users_phone (phone),
+  INDEX idx_users_created (created_at, id),
+  INDEX idx_users_complete_created (profile_complete, created_at, id),
+  INDEX idx_users_name (name)
 ) ENGINE=InnoDB;
 
 CREATE TABLE IF NOT EXISTS family_members (
@@ -44,7 +47,18 @@ CREATE TABLE IF NOT EXISTS payments (
   payment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
   UNIQUE KEY uk_razorpay_payment (razorpay_payment_id),
-  INDEX idx_payments_user (user_id)
+  INDEX idx_payments_user (user_id),
+  INDEX idx_payments_user_status_amount (user_id, status, amount),
+  INDEX idx_payments_status_date (status, payment_date),
+  INDEX idx_payments_user_date (user_id, payment_date)
+) ENGINE=InnoDB;
+
+-- Per-user success totals, maintained by POST /api/payment (admin user listing).
+CREATE TABLE IF NOT EXISTS user_donation_totals (
+  user_id INT NOT NULL PRIMARY KEY,
+  payment_count INT UNSIGNED NOT NULL DEFAULT 0,
+  total_paid DECIMAL(14, 2) NOT NULL DEFAULT 0,
+  INDEX idx_totals_paid (total_paid)
 ) ENGINE=InnoDB;
 
 CREATE TABLE IF NOT EXISTS kyc_documents (
@@ -92,3 +106,61 @@ CREATE TABLE IF NOT EXISTS user_notifications (
   FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
   INDEX idx_user_unread (user_id, read_at)
 ) ENGINE=InnoDB;
+
+-- Shared OTP / rate-limit store (OTP_STORE=mysql). Times are epoch milliseconds.
+CREATE TABLE IF NOT EXISTS otp_codes (
+  phone VARCHAR(20) NOT NULL PRIMARY KEY,
+  otp CHAR(6) NOT NULL,
+  attempts SMALLINT UNSIGNED NOT NULL DEFAULT 0,
+  expires_at BIGINT UNSIGNED NOT NULL,
+  INDEX idx_otp_expires (expires_at)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS otp_rate_limits (
+  bucket VARCHAR(64) NOT NULL PRIMARY KEY,
+  hits INT UNSIGNED NOT NULL DEFAULT 0,
+  reset_at BIGINT UNSIGNED NOT NULL,
+  INDEX idx_otp_rate_reset (reset_at)
+) ENGINE=InnoDB;
+
+-- Admin stats rollups (statsRollups.js). Rebuild: npm run stats:rebuild
+CREATE TABLE IF NOT EXISTS stats_rollups (
+  metric VARCHAR(16) NOT NULL,
+  period_type VARCHAR(8) NOT NULL,
+  period_key VARCHAR(10) NOT NULL,
+  tax_exempt TINYINT(1) NOT NULL DEFAULT 0,
+  event_count INT UNSIGNED NOT NULL DEFAULT 0,
+  amount DECIMAL(16, 2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (metric, period_type, period_key, tax_exempt)
+) ENGINE=InnoDB;
+
+-- Receipt email outbox (emailOutbox.js).
+CREATE TABLE IF NOT EXISTS email_outbox (
+  id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+  kind VARCHAR(32) NOT NULL,
+  recipient VARCHAR(255) NOT NULL,
+  payload JSON NOT NULL,
+  status VARCHAR(16) NOT NULL DEFAULT 'pending',
+  attempts SMALLINT UNSIGNED NOT NULL DEFAULT 0,
+  next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  locked_by VARCHAR(96) NULL,
+  locked_at DATETIME NULL,
+  last_error TEXT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  sent_at DATETIME NULL,
+  INDEX idx_outbox_due (status, next_attempt_at),
+  INDEX idx_outbox_locked (locked_by)
+) ENGINE=InnoDB;
+
+-- Razorpay settlement reconciliation staging (scripts/reconcile_settlements.py).
+CREATE TABLE IF NOT EXISTS settlement_staging (
+  run_id CHAR(32) NOT NULL,
+  file_no SMALLINT UNSIGNED NOT NULL,
+  line_no INT UNSIGNED NOT NULL,
+  razorpay_payment_id VARCHAR(255) NOT NULL,
+  amount DECIMAL(12, 2) NOT NULL,
+  settlement_id VARCHAR(64) NULL,
+  settled_at VARCHAR(32) NULL,
+  PRIMARY KEY (run_id, file_no, line_no),
+  INDEX idx_staging_payment (run_id, razorpay_payment_id)
+) ENGINE=InnoDB;
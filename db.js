@@ -0,0 +1,15 @@
+import mysql from 'mysql2/promise';
+
+// Same MYSQL_* settings for the API and the maintenance scripts. Call dotenv.config() first.
+export function createDbPool(overrides = {}) {
+  return mysql.createPool({
+    host: process.env.MYSQL_HOST || 'localhost',
+    user: process.env.MYSQL_USER || 'root',
+    password: process.env.MYSQL_PASSWORD || '',
+    database: process.env.MYSQL_DB || 'swagatham_foundation',
+    waitForConnections: true,
+    connectionLimit: 10,
+    queueLimit: 0,
+    ...overrides,
+  });
+}
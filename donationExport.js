@@ -0,0 +1,144 @@
+// Streaming donation export for 80G filing (GET /api/admin/exports/donations).
+// Rows flow from a mysql2 query stream through a Transform into the HTTP response; pipeline()
+// propagates backpressure, so memory stays flat regardless of row count.
+import { Transform } from 'stream';
+import { pipeline } from 'stream/promises';
+import { createDbPool } from './db.js';
+import { instrumentPool } from './metrics.js';
+
+const COLUMNS = [
+  'invoice_number',
+  'razorpay_payment_id',
+  'payment_date',
+  'amount',
+  'currency',
+  'tax_exemption',
+  'user_id',
+  'donor_name',
+  'donor_email',
+  'donor_phone',
+  'donor_address',
+  'pan_number',
+];
+
+// Free-text columns that could be interpreted as spreadsheet formulas.
+const TEXT_COLUMNS = new Set(['donor_name', 'donor_email', 'donor_address']);
+
+// Exports get their own small pool so a long export never holds one of the API pool's connections.
+let exportPool = null;
+function getExportPool() {
+  if (!exportPool) {
+    exportPool = instrumentPool(
+      createDbPool({ connectionLimit: Number(process.env.EXPORT_DB_CONNECTIONS || 2) }),
+      'export'
+    );
+  }
+  return exportPool;
+}
+
+function csvField(name, value) {
+  if (value == null) return '';
+  let s = value instanceof Date ? value.toISOString() : String(value);
+  if (TEXT_COLUMNS.has(name) && /^[=+\-@]/.test(s)) s = `'${s}`;
+  return /[",\r\n]/.test(s) ? `"${s.replace(/"/g, '""')}"` : s;
+}
+
+function formatRow(format) {
+  if (format === 'jsonl') {
+    return (row) => `${JSON.stringify({ ...row, tax_exemption: Boolean(row.tax_exemption) })}\n`;
+  }
+  return (row) => `${COLUMNS.map((c) => csvField(c, row[c])).join(',')}\r\n`;
+}
+
+function localDay(d) {
+  return `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
+}
+
+/** Parses `YYYY-MM-DD`; returns null for anything else. */
+function parseDay(value) {
+  if (typeof value !== 'string' || !/^\d{4}-\d{2}-\d{2}$/.test(value)) return null;
+  const d = new Date(`${value}T00:00:00`);
+  return Number.isNaN(d.getTime()) ? null : d;
+}
+
+/**
+ * Validates export query params. `fy=2025` means 1 Apr 2025 – 31 Mar 2026; otherwise `from`/`to`
+ * (inclusive days). `taxExempt=true|false` filters on the 80G flag.
+ * @returns {{ error: string } | { format, from: Date, to: Date, taxExempt: boolean | null }}
+ */
+export function parseExportQuery(query) {
+  const format = query.format || 'csv';
+  if (format !== 'csv' && format !== 'jsonl') return { error: 'format must be csv or jsonl' };
+
+  let from;
+  let to;
+  if (query.fy) {
+    if (typeof query.fy !== 'string' || !/^\d{4}$/.test(query.fy)) return { error: 'Invalid fy' };
+    const year = Number(query.fy);
+    if (year < 2000 || year > 2100) return { error: 'Invalid fy' };
+    from = new Date(year, 3, 1);
+    to = new Date(year + 1, 3, 1);
+  } else {
+    from = parseDay(query.from);
+    const last = parseDay(query.to);
+    if (!from || !last) return { error: 'Provide fy=YYYY or from/to as YYYY-MM-DD' };
+    to = new Date(last.getFullYear(), last.getMonth(), last.getDate() + 1);
+  }
+  if (to <= from) return { error: 'to must not be before from' };
+
+  let taxExempt = null;
+  if (query.taxExempt === 'true' || query.taxExempt === '1') taxExempt = true;
+  else if (query.taxExempt === 'false' || query.taxExempt === '0') taxExempt = false;
+  else if (query.taxExempt != null && query.taxExempt !== '') return { error: 'taxExempt must be true or false' };
+
+  return { format, from, to, taxExempt };
+}
+
+/** Streams successful donations in [from, to) to `res` as CSV or JSONL. */
+export async function streamDonationExport(res, { format, from, to, taxExempt }) {
+  const params = [from, to];
+  let taxFilter = '';
+  if (taxExempt !== null) {
+    taxFilter = 'AND p.tax_exemption = ?';
+    params.push(taxExempt ? 1 : 0);
+  }
+
+  const conn = await getExportPool().getConnection();
+  const rows = conn.connection
+    .query(
+      `SELECT p.invoice_number, p.razorpay_payment_id, p.payment_date, p.amount, p.currency, p.tax_exemption,
+          u.id AS user_id, u.name AS donor_name, u.email AS donor_email, u.phone AS donor_phone,
+          u.address AS donor_address, k.pan_number
+       FROM payments p
+       JOIN users u ON u.id = p.user_id
+       LEFT JOIN kyc_documents k ON k.user_id = p.user_id
+       WHERE p.status = 'success' AND p.payment_date >= ? AND p.payment_date < ? ${taxFilter}
+       ORDER BY p.payment_date, p.id`,
+      params
+    )
+    .stream({ highWaterMark: 500 });
+
+  const toLine = formatRow(format);
+  const encode = new Transform({
+    writableObjectMode: true,
+    transform(row, _enc, cb) {
+      cb(null, toLine(row));
+    },
+  });
+
+  const stamp = `${localDay(from)}_${localDay(new Date(to - 1))}`;
+  res.status(200);
+  res.set('Content-Type', format === 'csv' ? 'text/csv; charset=utf-8' : 'application/x-ndjson; charset=utf-8');
+  res.set('Content-Disposition', `attachment; filename="donations_${stamp}.${format}"`);
+  res.set('Cache-Control', 'no-store');
+  if (format === 'csv') res.write(`${COLUMNS.join(',')}\r\n`);
+
+  try {
+    await pipeline(rows, encode, res);
+    conn.release();
+  } catch (err) {
+    // The connection may still be mid-resultset (e.g. client disconnected); don't return it to the pool.
+    conn.destroy();
+    throw err;
+  }
+}
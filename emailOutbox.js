@@ -0,0 +1,150 @@
+// Durable email outbox (table: email_outbox, migration 007). Rows are written inside the caller's
+// transaction and delivered by a background dispatcher on the shared pooled SMTP transport.
+// Several API processes can run a dispatcher: each claims rows by stamping locked_by first.
+import { hostname } from 'os';
+import { randomUUID } from 'crypto';
+import { timeExternal } from './metrics.js';
+import { buildDonationReceiptMessage, getMailer } from './receiptEmail.js';
+
+const RENDERERS = {
+  donation_receipt: buildDonationReceiptMessage,
+};
+
+const STALE_LOCK_MINUTES = 10;
+const MAX_BACKOFF_SECONDS = 60 * 60;
+
+/** Queues one email on `conn` (use the transaction that records the underlying event). */
+export async function enqueueEmail(conn, kind, recipient, payload) {
+  if (!RENDERERS[kind]) throw new Error(`Unknown email kind: ${kind}`);
+  const [r] = await conn.execute(
+    'INSERT INTO email_outbox (kind, recipient, payload) VALUES (?, ?, ?)',
+    [kind, recipient, JSON.stringify(payload)]
+  );
+  return r.insertId;
+}
+
+function backoffSeconds(attempts) {
+  return Math.min(30 * 2 ** Math.max(attempts - 1, 0), MAX_BACKOFF_SECONDS);
+}
+
+/**
+ * Starts the dispatcher loop. Returns `{ kick, stop }`; `kick()` asks for a pass soon after a commit
+ * so receipts don't wait for the next poll.
+ */
+export function startEmailDispatcher(
+  db,
+  {
+    intervalMs = Number(process.env.EMAIL_OUTBOX_POLL_MS || 10000),
+    batchSize = Number(process.env.EMAIL_OUTBOX_BATCH || 20),
+    maxAttempts = Number(process.env.EMAIL_OUTBOX_MAX_ATTEMPTS || 8),
+  } = {}
+) {
+  const workerId = `${hostname()}:${process.pid}:${randomUUID().slice(0, 8)}`;
+  let timer = null;
+  let running = false;
+  let kicked = false;
+  let stopped = false;
+
+  async function claimBatch() {
+    await db.execute(
+      `UPDATE email_outbox
+       SET status = 'sending', locked_by = ?, locked_at = NOW(), attempts = attempts + 1
+       WHERE (status = 'pending' AND next_attempt_at <= NOW())
+          OR (status = 'sending' AND locked_at < NOW() - INTERVAL ${STALE_LOCK_MINUTES} MINUTE)
+       ORDER BY id
+       LIMIT ${batchSize}`,
+      [workerId]
+    );
+    const [rows] = await db.execute(
+      `SELECT id, kind, recipient, payload, attempts FROM email_outbox
+       WHERE locked_by = ? AND status = 'sending'`,
+      [workerId]
+    );
+    return rows;
+  }
+
+  async function deliver(mailer, row) {
+    const payload = typeof row.payload === 'string' ? JSON.parse(row.payload) : row.payload;
+    const message = RENDERERS[row.kind]({ ...payload, to: row.recipient });
+    await timeExternal('smtp.send', () => mailer.sendMail(message));
+  }
+
+  async function runOnce() {
+    const mailer = getMailer();
+    if (!mailer) return 0;
+    const rows = await claimBatch();
+    if (rows.length === 0) return 0;
+
+    const results = await Promise.allSettled(rows.map((row) => deliver(mailer, row)));
+    const sentIds = [];
+    for (let i = 0; i < rows.length; i++) {
+      const row = rows[i];
+      if (results[i].status === 'fulfilled') {
+        sentIds.push(row.id);
+        continue;
+      }
+      const reason = results[i].reason;
+      console.error(`[Outbox] #${row.id} to ${row.recipient} failed (attempt ${row.attempts}):`, reason?.message || reason);
+      await db.execute(
+        `UPDATE email_outbox
+         SET status = IF(attempts >= ?, 'failed', 'pending'),
+             next_attempt_at = NOW() + INTERVAL ? SECOND,
+             last_error = ?, locked_by = NULL, locked_at = NULL
+         WHERE id = ?`,
+        [maxAttempts, backoffSeconds(row.attempts), String(reason?.message || reason).slice(0, 1000), row.id]
+      );
+    }
+    if (sentIds.length > 0) {
+      await db.query(
+        `UPDATE email_outbox
+         SET status = 'sent', sent_at = NOW(), last_error = NULL, locked_by = NULL, locked_at = NULL
+         WHERE id IN (?)`,
+        [sentIds]
+      );
+      console.log(`[Outbox] Sent ${sentIds.length} email(s)`);
+    }
+    return rows.length;
+  }
+
+  async function loop() {
+    timer = null;
+    if (running || stopped) return;
+    running = true;
+    kicked = false;
+    let full = false;
+    try {
+      full = (await runOnce()) >= batchSize;
+    } catch (err) {
+      if (err.code === 'ER_NO_SUCH_TABLE') {
+        console.warn('[Outbox] email_outbox missing — run database/migrations/007_email_outbox.sql');
+        stopped = true;
+        return;
+      }
+      console.error('[Outbox] Dispatch error:', err.message || err);
+    } finally {
+      running = false;
+    }
+    // A full batch means more is probably waiting; go again straight away.
+    schedule(full || kicked ? 0 : intervalMs);
+  }
+
+  function schedule(ms) {
+    if (stopped) return;
+    if (timer) clearTimeout(timer);
+    timer = setTimeout(loop, ms);
+    timer.unref();
+  }
+
+  schedule(0);
+
+  return {
+    kick() {
+      if (running) kicked = true;
+      else schedule(0);
+    },
+    stop() {
+      stopped = true;
+      if (timer) clearTimeout(timer);
+    },
+  };
+}
@@ -0,0 +1,36 @@
+// Bounded in-process LRU with optional per-entry TTL. Map iteration order doubles as recency order.
+export class LruCache {
+  constructor({ max = 1000, ttlMs = 0 } = {}) {
+    this.max = max;
+    this.ttlMs = ttlMs;
+    this.map = new Map();
+  }
+
+  get(key) {
+    const entry = this.map.get(key);
+    if (!entry) return undefined;
+    this.map.delete(key);
+    if (entry.expiresAt && entry.expiresAt <= Date.now()) return undefined;
+    this.map.set(key, entry);
+    return entry.value;
+  }
+
+  set(key, value) {
+    this.map.delete(key);
+    if (this.map.size >= this.max) this.map.delete(this.map.keys().next().value);
+    this.map.set(key, { value, expiresAt: this.ttlMs ? Date.now() + this.ttlMs : 0 });
+    return value;
+  }
+
+  delete(key) {
+    return this.map.delete(key);
+  }
+
+  clear() {
+    this.map.clear();
+  }
+
+  get size() {
+    return this.map.size;
+  }
+}
@@ -0,0 +1,213 @@
+// In-process latency metrics for GET /metrics: per-route HTTP timings, per-statement MySQL timings,
+// pool acquire-wait and in-use gauges, and external calls (Twilio, SMTP). Values are per process.
+import { performance } from 'perf_hooks';
+
+const BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000];
+const MAX_STATEMENTS = 300;
+
+export class Histogram {
+  constructor() {
+    this.counts = new Array(BUCKETS_MS.length + 1).fill(0);
+    this.count = 0;
+    this.sum = 0;
+    this.max = 0;
+  }
+
+  observe(ms) {
+    let i = 0;
+    while (i < BUCKETS_MS.length && ms > BUCKETS_MS[i]) i += 1;
+    this.counts[i] += 1;
+    this.count += 1;
+    this.sum += ms;
+    if (ms > this.max) this.max = ms;
+  }
+
+  /** Quantile estimate, interpolated linearly inside the matching bucket. */
+  quantile(q) {
+    if (this.count === 0) return 0;
+    const rank = q * this.count;
+    let seen = 0;
+    for (let i = 0; i < this.counts.length; i++) {
+      if (seen + this.counts[i] >= rank) {
+        const hi = Math.min(i < BUCKETS_MS.length ? BUCKETS_MS[i] : this.max, this.max);
+        const lo = Math.min(i === 0 ? 0 : BUCKETS_MS[i - 1], hi);
+        return lo + ((hi - lo) * (rank - seen)) / (this.counts[i] || 1);
+      }
+      seen += this.counts[i];
+    }
+    return this.max;
+  }
+
+  summary() {
+    const round = (n) => Math.round(n * 100) / 100;
+    return {
+      count: this.count,
+      meanMs: round(this.count ? this.sum / this.count : 0),
+      p50Ms: round(this.quantile(0.5)),
+      p95Ms: round(this.quantile(0.95)),
+      p99Ms: round(this.quantile(0.99)),
+      maxMs: round(this.max),
+    };
+  }
+}
+
+const routes = new Map();
+const statements = new Map();
+const externals = new Map();
+const pools = new Map();
+const startedAt = Date.now();
+
+function histogramFor(map, key) {
+  let h = map.get(key);
+  if (!h) {
+    h = new Histogram();
+    map.set(key, h);
+  }
+  return h;
+}
+
+function statementKey(sql) {
+  const text = typeof sql === 'string' ? sql : sql?.sql || String(sql);
+  const key = text.replace(/\s+/g, ' ').trim().slice(0, 160);
+  // Bound cardinality: dynamically built SQL must not grow the map without limit.
+  return statements.has(key) || statements.size < MAX_STATEMENTS ? key : '(other)';
+}
+
+/** Express middleware recording latency per matched route pattern (e.g. `GET /api/admin/users/:id`). */
+export function routeMetrics() {
+  return (req, res, next) => {
+    const started = performance.now();
+    res.on('finish', () => {
+      const path = req.route ? `${req.baseUrl}${req.route.path}` : '(unmatched)';
+      histogramFor(routes, `${req.method} ${path} ${Math.floor(res.statusCode / 100)}xx`).observe(
+        performance.now() - started
+      );
+    });
+    next();
+  };
+}
+
+/** Times an external call, e.g. `timeExternal('twilio.sms', () => client.messages.create(...))`. */
+export async function timeExternal(name, fn) {
+  const started = performance.now();
+  try {
+    return await fn();
+  } finally {
+    histogramFor(externals, name).observe(performance.now() - started);
+  }
+}
+
+async function timeStatement(sql, run) {
+  const started = performance.now();
+  try {
+    return await run();
+  } finally {
+    histogramFor(statements, statementKey(sql)).observe(performance.now() - started);
+  }
+}
+
+/**
+ * Wraps a mysql2/promise pool in place: getConnection records acquire wait and in-use/waiting gauges;
+ * query/execute on the pool and on checked-out connections record per-statement timings.
+ * Pool-level query/execute go through getConnection so their checkout wait is measured too.
+ */
+export function instrumentPool(pool, name = 'main') {
+  const state = { waiting: 0, inUse: 0, acquired: 0, acquire: new Histogram() };
+  pools.set(name, state);
+  const getConnection = pool.getConnection.bind(pool);
+
+  pool.getConnection = async () => {
+    const started = performance.now();
+    state.waiting += 1;
+    let conn;
+    try {
+      conn = await getConnection();
+    } finally {
+      state.waiting -= 1;
+      state.acquire.observe(performance.now() - started);
+    }
+    state.inUse += 1;
+    state.acquired += 1;
+
+    let returned = false;
+    const settle = (fn) => (...args) => {
+      if (!returned) {
+        returned = true;
+        state.inUse -= 1;
+      }
+      return fn(...args);
+    };
+    const query = conn.query.bind(conn);
+    const execute = conn.execute.bind(conn);
+    conn.query = (sql, params) => timeStatement(sql, () => query(sql, params));
+    conn.execute = (sql, params) => timeStatement(sql, () => execute(sql, params));
+    conn.release = settle(conn.release.bind(conn));
+    conn.destroy = settle(conn.destroy.bind(conn));
+    return conn;
+  };
+
+  const viaConnection = (method) => async (sql, params) => {
+    const conn = await pool.getConnection();
+    try {
+      return await conn[method](sql, params);
+    } finally {
+      conn.release();
+    }
+  };
+  pool.query = viaConnection('query');
+  pool.execute = viaConnection('execute');
+  return pool;
+}
+
+export function metricsSnapshot() {
+  const summarize = (map) => Object.fromEntries([...map].map(([k, h]) => [k, h.summary()]));
+  return {
+    uptimeSeconds: Math.round((Date.now() - startedAt) / 1000),
+    routes: summarize(routes),
+    statements: summarize(statements),
+    externals: summarize(externals),
+    pools: Object.fromEntries(
+      [...pools].map(([k, s]) => [
+        k,
+        { inUse: s.inUse, waiting: s.waiting, acquired: s.acquired, acquireWait: s.acquire.summary() },
+      ])
+    ),
+  };
+}
+
+function label(value) {
+  return String(value).replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, ' ');
+}
+
+function promHistogram(lines, metric, labels, h) {
+  let cumulative = 0;
+  BUCKETS_MS.forEach((le, i) => {
+    cumulative += h.counts[i];
+    lines.push(`${metric}_bucket{${labels},le="${le}"} ${cumulative}`);
+  });
+  lines.push(`${metric}_bucket{${labels},le="+Inf"} ${h.count}`);
+  lines.push(`${metric}_sum{${labels}} ${h.sum.toFixed(3)}`);
+  lines.push(`${metric}_count{${labels}} ${h.count}`);
+}
+
+/** Prometheus text exposition of the same data. */
+export function metricsPrometheus() {
+  const lines = [];
+  lines.push('# TYPE http_request_duration_ms histogram');
+  for (const [key, h] of routes) {
+    const [method, path, status] = key.split(' ');
+    promHistogram(lines, 'http_request_duration_ms', `method="${method}",route="${label(path)}",status="${status}"`, h);
+  }
+  lines.push('# TYPE db_statement_duration_ms histogram');
+  for (const [sql, h] of statements) promHistogram(lines, 'db_statement_duration_ms', `statement="${label(sql)}"`, h);
+  lines.push('# TYPE external_call_duration_ms histogram');
+  for (const [name, h] of externals) promHistogram(lines, 'external_call_duration_ms', `call="${label(name)}"`, h);
+  // Each family's samples must be contiguous, so emit one family across all pools before the next.
+  lines.push('# TYPE db_pool_acquire_wait_ms histogram');
+  for (const [name, s] of pools) promHistogram(lines, 'db_pool_acquire_wait_ms', `pool="${name}"`, s.acquire);
+  lines.push('# TYPE db_pool_connections_in_use gauge');
+  for (const [name, s] of pools) lines.push(`db_pool_connections_in_use{pool="${name}"} ${s.inUse}`);
+  lines.push('# TYPE db_pool_waiting_requests gauge');
+  for (const [name, s] of pools) lines.push(`db_pool_waiting_requests{pool="${name}"} ${s.waiting}`);
+  return `${lines.join('\n')}\n`;
+}
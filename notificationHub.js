@@ -0,0 +1,132 @@
+// Server-sent-events fan-out for user_notifications.
+// Every API process tails the table by primary key (id > lastId) while it has subscribers, so a
+// notification inserted by any process reaches streams connected to any other. kick() after a local
+// insert makes delivery immediate instead of waiting for the next poll.
+
+const MAX_STREAMS_PER_USER = 5;
+const TAIL_BATCH = 500;
+
+function writeEvent(res, row) {
+  if (res.writableEnded || res.destroyed) return;
+  const data = JSON.stringify({ id: row.id, message: row.message, read_at: row.read_at, created_at: row.created_at });
+  res.write(`id: ${row.id}\nevent: notification\ndata: ${data}\n\n`);
+}
+
+export class NotificationHub {
+  constructor(
+    db,
+    {
+      pollMs = Number(process.env.NOTIFICATION_POLL_MS || 3000),
+      heartbeatMs = 25000,
+    } = {}
+  ) {
+    this.db = db;
+    this.pollMs = pollMs;
+    this.heartbeatMs = heartbeatMs;
+    this.streams = new Map(); // userId → Set<res>
+    this.count = 0;
+    this.lastId = null;
+    this.polling = null;
+    this.timer = null;
+    this.epoch = 0; // bumped by #stop(); a poll from an earlier epoch discards its rows
+  }
+
+  /**
+   * Attaches an SSE response for `userId`. Sends anything newer than `afterId` first, so rows created
+   * between the client's history fetch and connecting are not lost (clients de-duplicate by id).
+   */
+  async subscribe(userId, res, afterId) {
+    const set = this.streams.get(userId) || new Set();
+    if (set.size >= MAX_STREAMS_PER_USER) {
+      return res.status(429).json({ success: false, error: 'Too many open notification streams' });
+    }
+
+    res.set({
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache, no-transform',
+      Connection: 'keep-alive',
+      'X-Accel-Buffering': 'no',
+    });
+    res.flushHeaders();
+    res.write('retry: 5000\n\n');
+
+    set.add(res);
+    this.streams.set(userId, set);
+    this.count += 1;
+    this.#start();
+
+    const heartbeat = setInterval(() => res.write(': ping\n\n'), this.heartbeatMs);
+    res.on('close', () => {
+      clearInterval(heartbeat);
+      set.delete(res);
+      if (set.size === 0) this.streams.delete(userId);
+      this.count -= 1;
+      if (this.count === 0) this.#stop();
+    });
+
+    await this.#ensureCursor();
+    if (Number.isFinite(afterId) && afterId >= 0) {
+      const [rows] = await this.db.execute(
+        `SELECT id, message, read_at, created_at FROM user_notifications
+         WHERE user_id = ? AND read_at IS NULL AND id > ? ORDER BY id LIMIT 100`,
+        [userId, afterId]
+      );
+      for (const row of rows) writeEvent(res, row);
+    }
+  }
+
+  /** Polls right away (call after inserting notifications). */
+  kick() {
+    if (this.count > 0) this.#poll();
+  }
+
+  async #ensureCursor() {
+    if (this.lastId !== null) return;
+    const epoch = this.epoch;
+    const [rows] = await this.db.execute('SELECT COALESCE(MAX(id), 0) AS id FROM user_notifications');
+    if (epoch === this.epoch) this.lastId ??= Number(rows[0].id);
+  }
+
+  #poll() {
+    this.polling ||= (async () => {
+      const epoch = this.epoch;
+      try {
+        await this.#ensureCursor();
+        let rows;
+        do {
+          [rows] = await this.db.execute(
+            `SELECT id, user_id, message, read_at, created_at FROM user_notifications
+             WHERE id > ? ORDER BY id LIMIT ${TAIL_BATCH}`,
+            [this.lastId]
+          );
+          // Stopped while the query ran: lastId was reset, so don't write an old cursor back.
+          if (epoch !== this.epoch) return;
+          for (const row of rows) {
+            const set = this.streams.get(row.user_id);
+            if (set) for (const res of set) writeEvent(res, row);
+            this.lastId = row.id;
+          }
+        } while (rows.length === TAIL_BATCH);
+      } catch (err) {
+        console.error('[Notifications] Poll failed:', err.message || err);
+      } finally {
+        this.polling = null;
+      }
+    })();
+    return this.polling;
+  }
+
+  #start() {
+    if (this.timer) return;
+    this.timer = setInterval(() => this.#poll(), this.pollMs);
+    this.timer.unref();
+  }
+
+  // With nobody listening there is nothing to tail; re-read MAX(id) when the next stream opens.
+  #stop() {
+    clearInterval(this.timer);
+    this.timer = null;
+    this.lastId = null;
+    this.epoch += 1;
+  }
+}
@@ -0,0 +1,204 @@
+// OTP + rate-limit storage. `memory` is per-process (dev); `mysql` is shared by every API process
+// behind the load balancer. Both sweep expired rows on a timer so abandoned OTPs don't pile up.
+
+const SWEEP_INTERVAL_MS = 60 * 1000;
+const MEMORY_MAX_ENTRIES = 50000;
+const MYSQL_SWEEP_BATCH = 5000;
+
+function verifyRecord(record, otp, maxAttempts) {
+  if (!record || Date.now() > record.expiresAt) return 'expired';
+  if (record.attempts >= maxAttempts) return 'locked';
+  if (record.otp !== otp) return 'invalid';
+  return 'ok';
+}
+
+export class MemoryOtpStore {
+  constructor({ maxEntries = MEMORY_MAX_ENTRIES, sweepIntervalMs = SWEEP_INTERVAL_MS } = {}) {
+    this.kind = 'memory';
+    this.maxEntries = maxEntries;
+    this.otps = new Map();
+    this.hits = new Map();
+    this.timer = setInterval(() => this.sweep(), sweepIntervalMs);
+    this.timer.unref();
+  }
+
+  // Map keeps insertion order, so the first key is the oldest entry.
+  #bound(map) {
+    if (map.size < this.maxEntries) return;
+    this.sweep();
+    while (map.size >= this.maxEntries) {
+      map.delete(map.keys().next().value);
+    }
+  }
+
+  async save(phone, otp, ttlMs) {
+    this.otps.delete(phone);
+    this.#bound(this.otps);
+    this.otps.set(phone, { otp, attempts: 0, expiresAt: Date.now() + ttlMs });
+  }
+
+  async verify(phone, otp, maxAttempts) {
+    const record = this.otps.get(phone);
+    const result = verifyRecord(record, otp, maxAttempts);
+    if (result === 'ok' || result === 'expired') this.otps.delete(phone);
+    else if (result === 'invalid') record.attempts += 1;
+    return result;
+  }
+
+  async hit(bucket, windowMs) {
+    const now = Date.now();
+    let entry = this.hits.get(bucket);
+    if (!entry || entry.resetAt <= now) {
+      this.hits.delete(bucket);
+      this.#bound(this.hits);
+      entry = { count: 0, resetAt: now + windowMs };
+      this.hits.set(bucket, entry);
+    }
+    entry.count += 1;
+    return { count: entry.count, resetAt: entry.resetAt };
+  }
+
+  sweep() {
+    const now = Date.now();
+    for (const [k, v] of this.otps) if (v.expiresAt <= now) this.otps.delete(k);
+    for (const [k, v] of this.hits) if (v.resetAt <= now) this.hits.delete(k);
+  }
+
+  async close() {
+    clearInterval(this.timer);
+  }
+}
+
+// Uses otp_codes / otp_rate_limits (database/migrations/004_otp_store.sql). Times are epoch ms so
+// processes with different MySQL session time zones agree on expiry.
+export class MySqlOtpStore {
+  constructor(db, { sweepIntervalMs = SWEEP_INTERVAL_MS } = {}) {
+    this.kind = 'mysql';
+    this.db = db;
+    this.timer = setInterval(() => {
+      this.sweep().catch((e) => console.warn('[OTP] sweep failed:', e.message));
+    }, sweepIntervalMs);
+    this.timer.unref();
+  }
+
+  async save(phone, otp, ttlMs) {
+    await this.db.execute(
+      `INSERT INTO otp_codes (phone, otp, attempts, expires_at) VALUES (?, ?, 0, ?)
+       ON DUPLICATE KEY UPDATE otp = VALUES(otp), attempts = 0, expires_at = VALUES(expires_at)`,
+      [phone, otp, Date.now() + ttlMs]
+    );
+  }
+
+  async verify(phone, otp, maxAttempts) {
+    const now = Date.now();
+    // Single-use across processes: only one DELETE can win for a given code.
+    const [del] = await this.db.execute(
+      'DELETE FROM otp_codes WHERE phone = ? AND otp = ? AND expires_at > ? AND attempts < ?',
+      [phone, otp, now, maxAttempts]
+    );
+    if (del.affectedRows > 0) return 'ok';
+
+    const [rows] = await this.db.execute(
+      'SELECT otp, attempts, expires_at FROM otp_codes WHERE phone = ?',
+      [phone]
+    );
+    const record = rows[0] && {
+      otp: rows[0].otp,
+      attempts: rows[0].attempts,
+      expiresAt: Number(rows[0].expires_at),
+    };
+    const result = verifyRecord(record, otp, maxAttempts);
+    if (result === 'expired' && record) {
+      await this.db.execute('DELETE FROM otp_codes WHERE phone = ? AND expires_at <= ?', [phone, now]);
+    } else if (result === 'invalid' || result === 'ok') {
+      // 'ok' here means another request consumed or replaced the code between the two statements.
+      await this.db.execute('UPDATE otp_codes SET attempts = attempts + 1 WHERE phone = ?', [phone]);
+      return 'invalid';
+    }
+    return result;
+  }
+
+  async hit(bucket, windowMs) {
+    const now = Date.now();
+    await this.db.execute(
+      `INSERT INTO otp_rate_limits (bucket, hits, reset_at) VALUES (?, 1, ?)
+       ON DUPLICATE KEY UPDATE
+         hits = IF(reset_at <= ?, 1, hits + 1),
+         reset_at = IF(reset_at <= ?, VALUES(reset_at), reset_at)`,
+      [bucket, now + windowMs, now, now]
+    );
+    const [rows] = await this.db.execute(
+      'SELECT hits, reset_at FROM otp_rate_limits WHERE bucket = ?',
+      [bucket]
+    );
+    return { count: rows[0]?.hits ?? 1, resetAt: Number(rows[0]?.reset_at ?? now + windowMs) };
+  }
+
+  async sweep() {
+    const now = Date.now();
+    await this.db.execute(`DELETE FROM otp_codes WHERE expires_at <= ? LIMIT ${MYSQL_SWEEP_BATCH}`, [now]);
+    await this.db.execute(`DELETE FROM otp_rate_limits WHERE reset_at <= ? LIMIT ${MYSQL_SWEEP_BATCH}`, [
+      now,
+    ]);
+  }
+
+  async close() {
+    clearInterval(this.timer);
+  }
+}
+
+/**
+ * OTP_STORE=mysql|memory (default: mysql in production, memory otherwise).
+ * Falls back to memory if the mysql tables have not been migrated yet.
+ */
+export async function createOtpStore(db, kind = process.env.OTP_STORE) {
+  const wanted = kind || (process.env.NODE_ENV === 'production' ? 'mysql' : 'memory');
+  if (wanted === 'mysql') {
+    try {
+      await db.execute('SELECT 1 FROM otp_codes LIMIT 1');
+      await db.execute('SELECT 1 FROM otp_rate_limits LIMIT 1');
+      return new MySqlOtpStore(db);
+    } catch (e) {
+      if (e.code !== 'ER_NO_SUCH_TABLE') throw e;
+      console.warn(
+        '[OTP] otp_codes / otp_rate_limits missing — run database/migrations/004_otp_store.sql. Using in-memory store.'
+      );
+    }
+  }
+  return new MemoryOtpStore();
+}
+
+/**
+ * Express middleware limiting OTP sends per client IP and per phone number.
+ * Counters live in the OTP store, so limits hold across API processes when it is mysql-backed.
+ * The IP bucket uses req.ip, so behind a proxy the app needs `trust proxy` (TRUST_PROXY in server1.js).
+ */
+export function otpRateLimit(
+  store,
+  {
+    windowMs = 15 * 60 * 1000,
+    maxPerIp = Number(process.env.OTP_MAX_PER_IP || 5),
+    maxPerPhone = Number(process.env.OTP_MAX_PER_PHONE || 3),
+  } = {}
+) {
+  return async (req, res, next) => {
+    try {
+      const checks = [[`ip:${req.ip}`, maxPerIp, 'Too many OTP requests from this IP, please try again later']];
+      // Same coercion as the OTP routes, so a numeric phoneNumber cannot skip the per-phone bucket.
+      const phone = req.body?.phoneNumber == null ? '' : String(req.body.phoneNumber);
+      if (/^\d{10}$/.test(phone)) {
+        checks.push([`phone:${phone}`, maxPerPhone, 'Too many OTP requests for this number, please try again later']);
+      }
+      for (const [bucket, max, error] of checks) {
+        const { count, resetAt } = await store.hit(bucket, windowMs);
+        if (count > max) {
+          res.set('Retry-After', String(Math.max(1, Math.ceil((resetAt - Date.now()) / 1000))));
+          return res.status(429).json({ success: false, error });
+        }
+      }
+      next();
+    } catch (err) {
+      next(err);
+    }
+  };
+}
@@ -0,0 +1,22 @@
+// Opaque keyset cursors over (timestamp, id) for newest-first listings.
+export function encodeKeysetCursor(at, id) {
+  return Buffer.from(JSON.stringify([new Date(at).toISOString(), id])).toString('base64url');
+}
+
+/** Returns `{ at: Date, id }`, or null when the cursor is malformed. */
+export function decodeKeysetCursor(cursor) {
+  try {
+    const [at, id] = JSON.parse(Buffer.from(String(cursor), 'base64url').toString('utf8'));
+    const date = new Date(at);
+    const n = parseInt(id, 10);
+    if (Number.isNaN(date.getTime()) || !Number.isFinite(n)) return null;
+    return { at: date, id: n };
+  } catch {
+    return null;
+  }
+}
+
+/** Clamps a `limit` query value to [1, max]. */
+export function pageLimit(value, fallback, max) {
+  return Math.min(Math.max(parseInt(value, 10) || fallback, 1), max);
+}
@@ -5,7 +5,7 @@ import { fileURLToPath } from 'url';
 
 const __dirname = dirname(fileURLToPath(import.meta.url));
 
-function logoDataUri() {
+function readLogoDataUri() {
   const logoPath = join(__dirname, 'client', 'public', 'logo-mark.svg');
   try {
     if (existsSync(logoPath)) {
@@ -18,20 +18,45 @@ function logoDataUri() {
   return '';
 }
 
+// Read and encoded once per process; the logo never changes at runtime.
+const LOGO_DATA_URI = readLogoDataUri();
+const currencyFormats = new Map();
+
+function formatAmount(amount, currency) {
+  const code = currency || 'INR';
+  let fmt = currencyFormats.get(code);
+  if (!fmt) {
+    fmt = new Intl.NumberFormat('en-IN', { style: 'currency', currency: code, maximumFractionDigits: 2 });
+    currencyFormats.set(code, fmt);
+  }
+  return fmt.format(Number(amount));
+}
+
+export function isMailerConfigured() {
+  return Boolean(process.env.SMTP_HOST && process.env.SMTP_USER && process.env.SMTP_PASS);
+}
+
+/** Pooled keep-alive transport (SMTP_MAX_CONNECTIONS, default 3). Callers share one instance via getMailer(). */
 export function createMailer() {
-  const host = process.env.SMTP_HOST;
+  if (!isMailerConfigured()) return null;
   const port = Number(process.env.SMTP_PORT || 587);
-  const user = process.env.SMTP_USER;
-  const pass = process.env.SMTP_PASS;
-  if (!host || !user || !pass) return null;
   return nodemailer.createTransport({
-    host,
+    pool: true,
+    maxConnections: Number(process.env.SMTP_MAX_CONNECTIONS || 3),
+    maxMessages: 100,
+    host: process.env.SMTP_HOST,
     port,
     secure: port === 465,
-    auth: { user, pass },
+    auth: { user: process.env.SMTP_USER, pass: process.env.SMTP_PASS },
   });
 }
 
+let sharedMailer;
+export function getMailer() {
+  if (sharedMailer === undefined) sharedMailer = createMailer();
+  return sharedMailer;
+}
+
 function buildInvoiceHtml({
   donorName,
   amount,
@@ -41,16 +66,12 @@ function buildInvoiceHtml({
   taxExemption,
   paymentDate,
 }) {
-  const logo = logoDataUri();
-  const amt = Number(amount);
-  const formatted = new Intl.NumberFormat('en-IN', {
-    style: 'currency',
-    currency: currency || 'INR',
-    maximumFractionDigits: 2,
-  }).format(amt);
+  const logo = LOGO_DATA_URI;
+  const formatted = formatAmount(amount, currency);
+  const date = typeof paymentDate === 'string' ? new Date(paymentDate) : paymentDate;
   const dateStr =
-    paymentDate instanceof Date
-      ? paymentDate.toLocaleString('en-IN', { dateStyle: 'medium', timeStyle: 'short' })
+    date instanceof Date && !Number.isNaN(date.getTime())
+      ? date.toLocaleString('en-IN', { dateStyle: 'medium', timeStyle: 'short' })
       : String(paymentDate);
 
   return `<!DOCTYPE html>
@@ -118,51 +139,42 @@ function escapeHtml(s) {
     .replace(/"/g, '&quot;');
 }
 
+function fromAddress() {
+  const from =
+    process.env.SMTP_FROM ||
+    process.env.SMTP_USER ||
+    'noreply@swagatham.local';
+  const fromName = process.env.SMTP_FROM_NAME || 'Swagatham Foundation';
+  return `"${fromName}" <${from}>`;
+}
+
+/** Builds the nodemailer message for a receipt. `paymentDate` may be a Date or an ISO string (outbox payloads). */
+export function buildDonationReceiptMessage({ to, invoiceNo, ...receipt }) {
+  return {
+    from: fromAddress(),
+    to,
+    subject: `Donation receipt ${invoiceNo} — Swagatham Foundation`,
+    html: buildInvoiceHtml({ invoiceNo, ...receipt }),
+  };
+}
+
 /**
+ * Sends one receipt immediately on the shared pooled transport. The payment route queues receipts in
+ * email_outbox instead (see emailOutbox.js); this is for one-off sends.
  * @returns {Promise<{ sent: boolean, error?: string }>}
  */
-export async function sendDonationReceiptEmail({
-  to,
-  donorName,
-  amount,
-  currency,
-  razorpayPaymentId,
-  invoiceNo,
-  taxExemption,
-  paymentDate,
-}) {
-  const mailer = createMailer();
+export async function sendDonationReceiptEmail(receipt) {
+  const mailer = getMailer();
   if (!mailer) {
     console.log(
-      `[Receipt] SMTP not configured — would email ${to} invoice ${invoiceNo}. Set SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS.`
+      `[Receipt] SMTP not configured — would email ${receipt.to} invoice ${receipt.invoiceNo}. Set SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS.`
     );
     return { sent: false };
   }
 
-  const from =
-    process.env.SMTP_FROM ||
-    process.env.SMTP_USER ||
-    'noreply@swagatham.local';
-  const fromName = process.env.SMTP_FROM_NAME || 'Swagatham Foundation';
-
-  const html = buildInvoiceHtml({
-    donorName,
-    amount,
-    currency,
-    razorpayPaymentId,
-    invoiceNo,
-    taxExemption,
-    paymentDate,
-  });
-
   try {
-    await mailer.sendMail({
-      from: `"${fromName}" <${from}>`,
-      to,
-      subject: `Donation receipt ${invoiceNo} — Swagatham Foundation`,
-      html,
-    });
-    console.log(`[Receipt] Email sent to ${to} (${invoiceNo})`);
+    await mailer.sendMail(buildDonationReceiptMessage(receipt));
+    console.log(`[Receipt] Email sent to ${receipt.to} (${receipt.invoiceNo})`);
     return { sent: true };
   } catch (e) {
     console.error('[Receipt] Email failed:', e.message || e);
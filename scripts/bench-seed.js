@@ -0,0 +1,94 @@
+// Seeds a local database for the load benchmark (scripts/load-benchmark.js).
+//   mysql -u root -p < database/schema.sql
+//   npm run bench:seed -- --users 5000 --payments 3
+// Donors get phones 7000000000 + n, so the benchmark can log in as any of them. Re-running is safe
+// (INSERT IGNORE); donation totals and stats rollups are recomputed at the end.
+import dotenv from 'dotenv';
+import { createDbPool } from '../db.js';
+import { rebuildRollups } from '../statsRollups.js';
+
+dotenv.config();
+
+const BENCH_PHONE_BASE = 7000000000;
+const BATCH = 1000;
+
+function arg(name, fallback) {
+  const i = process.argv.indexOf(`--${name}`);
+  return i !== -1 && process.argv[i + 1] ? Number(process.argv[i + 1]) : fallback;
+}
+
+const users = arg('users', 5000);
+const paymentsPerUser = arg('payments', 3);
+const db = createDbPool({ connectionLimit: 2 });
+const started = Date.now();
+
+try {
+  for (let from = 0; from < users; from += BATCH) {
+    const rows = [];
+    for (let n = from; n < Math.min(from + BATCH, users); n++) {
+      const complete = n % 3 !== 0;
+      rows.push([
+        String(BENCH_PHONE_BASE + n),
+        complete ? `Bench Donor ${n}` : null,
+        complete ? `donor${n}@bench.local` : null,
+        1,
+        complete ? 1 : 0,
+      ]);
+    }
+    await db.query('INSERT IGNORE INTO users (phone, name, email, otp_verified, profile_complete) VALUES ?', [rows]);
+  }
+
+  const [ids] = await db.query('SELECT id FROM users WHERE phone BETWEEN ? AND ? ORDER BY id', [
+    String(BENCH_PHONE_BASE),
+    String(BENCH_PHONE_BASE + users - 1),
+  ]);
+  let payments = [];
+  const flush = async () => {
+    if (payments.length === 0) return;
+    await db.query(
+      `INSERT IGNORE INTO payments (user_id, amount, razorpay_payment_id, status, tax_exemption, currency, payment_date)
+       VALUES ?`,
+      [payments]
+    );
+    payments = [];
+  };
+  for (const { id } of ids) {
+    for (let k = 0; k < paymentsPerUser; k++) {
+      const daysAgo = Math.floor(Math.random() * 365);
+      payments.push([
+        id,
+        (100 + Math.floor(Math.random() * 50) * 100).toFixed(2),
+        `pay_seed_${id}_${k}`,
+        'success',
+        Math.random() < 0.4 ? 1 : 0,
+        'INR',
+        new Date(Date.now() - daysAgo * 86400000),
+      ]);
+      if (payments.length >= BATCH) await flush();
+    }
+  }
+  await flush();
+
+  await db.query(
+    `INSERT INTO user_donation_totals (user_id, payment_count, total_paid)
+     SELECT user_id, COUNT(*), SUM(amount) FROM payments WHERE status = 'success' GROUP BY user_id
+     ON DUPLICATE KEY UPDATE payment_count = VALUES(payment_count), total_paid = VALUES(total_paid)`
+  );
+  const conn = await db.getConnection();
+  try {
+    await rebuildRollups(conn);
+  } finally {
+    conn.release();
+  }
+
+  console.log(
+    `✅ Seeded ${ids.length} bench users (${BENCH_PHONE_BASE}…) with ${paymentsPerUser} payments each in ${
+      Date.now() - started
+    } ms`
+  );
+} catch (err) {
+  console.error('❌ Seeding failed:', err.message);
+  process.exitCode = 1;
+} finally {
+  await db.end();
+}
@@ -0,0 +1,133 @@
+// Replays the donor + admin flow against a running API and reports throughput and p50/p95/p99.
+//
+//   npm run bench:seed -- --users 5000
+//   OTP_MAX_PER_IP=1000000 OTP_MAX_PER_PHONE=1000000 npm start      (non-production: OTP hint in response)
+//   npm run bench -- --concurrency 20 --iterations 25 --users 5000
+//
+// Each virtual user loops: send-otp → verify-otp → profile → payment → admin stats + users page.
+// Use --json to print the report as JSON (e.g. to diff runs before a campaign).
+const BENCH_PHONE_BASE = 7000000000;
+
+function arg(name, fallback) {
+  const i = process.argv.indexOf(`--${name}`);
+  if (i === -1) return fallback;
+  const v = process.argv[i + 1];
+  return typeof fallback === 'number' ? Number(v) : v;
+}
+
+const base = arg('base', process.env.BENCH_API_BASE || 'http://localhost:4000/api');
+const concurrency = arg('concurrency', 10);
+const iterations = arg('iterations', 20);
+const users = arg('users', 5000);
+const adminPhone = arg('admin-phone', process.env.BENCH_ADMIN_PHONE || '9789146620');
+const asJson = process.argv.includes('--json');
+
+const samples = new Map(); // step → { ms: number[], errors: number }
+
+async function step(name, fn) {
+  const s = samples.get(name) || { ms: [], errors: 0 };
+  samples.set(name, s);
+  const started = performance.now();
+  try {
+    return await fn();
+  } catch (err) {
+    s.errors += 1;
+    throw err;
+  } finally {
+    s.ms.push(performance.now() - started);
+  }
+}
+
+async function call(method, path, { token, body } = {}) {
+  const res = await fetch(`${base}${path}`, {
+    method,
+    headers: {
+      'Content-Type': 'application/json',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    body: body ? JSON.stringify(body) : undefined,
+  });
+  const data = await res.json().catch(() => ({}));
+  if (!res.ok) throw new Error(`${method} ${path} → ${res.status} ${data.error || ''}`);
+  return data;
+}
+
+async function login(phone, label) {
+  const sent = await step(`${label}.send-otp`, () => call('POST', '/send-otp', { body: { phoneNumber: phone } }));
+  if (!sent.devOtpHint) {
+    throw new Error('No devOtpHint in /send-otp response — run the API with NODE_ENV other than production');
+  }
+  const verified = await step(`${label}.verify-otp`, () =>
+    call('POST', '/verify-otp', { body: { phoneNumber: phone, otp: sent.devOtpHint } })
+  );
+  return verified.token;
+}
+
+async function virtualUser(vu, adminToken) {
+  for (let i = 0; i < iterations; i++) {
+    try {
+      const phone = String(BENCH_PHONE_BASE + Math.floor(Math.random() * users));
+      const token = await login(phone, 'donor');
+      await step('donor.profile', () => call('GET', '/user/profile', { token }));
+      await step('donor.payment', () =>
+        call('POST', '/payment', {
+          token,
+          body: {
+            amount: 500,
+            razorpay_payment_id: `pay_bench_${Date.now()}_${vu}_${i}`,
+            tax_exemption: i % 2 === 0,
+          },
+        })
+      );
+      await step('admin.stats', () => call('GET', '/admin/stats', { token: adminToken }));
+      await step('admin.users', () => call('GET', '/admin/users?limit=50', { token: adminToken }));
+    } catch (err) {
+      if (!asJson) console.warn(`[vu ${vu}] ${err.message}`);
+    }
+  }
+}
+
+function percentile(sorted, q) {
+  if (sorted.length === 0) return 0;
+  return sorted[Math.min(sorted.length - 1, Math.ceil(q * sorted.length) - 1)];
+}
+
+const started = performance.now();
+const adminToken = await login(adminPhone, 'admin');
+await Promise.all(Array.from({ length: concurrency }, (_, vu) => virtualUser(vu, adminToken)));
+const elapsedS = (performance.now() - started) / 1000;
+
+const round = (n) => Math.round(n * 10) / 10;
+const report = {
+  base,
+  concurrency,
+  iterations,
+  elapsedSeconds: round(elapsedS),
+  flowsPerSecond: round((samples.get('donor.payment')?.ms.length || 0) / elapsedS),
+  requestsPerSecond: round([...samples.values()].reduce((n, s) => n + s.ms.length, 0) / elapsedS),
+  steps: Object.fromEntries(
+    [...samples].map(([name, s]) => {
+      const sorted = [...s.ms].sort((a, b) => a - b);
+      return [
+        name,
+        {
+          count: sorted.length,
+          errors: s.errors,
+          p50Ms: round(percentile(sorted, 0.5)),
+          p95Ms: round(percentile(sorted, 0.95)),
+          p99Ms: round(percentile(sorted, 0.99)),
+        },
+      ];
+    })
+  ),
+};
+
+if (asJson) {
+  console.log(JSON.stringify(report, null, 2));
+} else {
+  console.log(
+    `\n${base}  concurrency=${concurrency} iterations=${iterations}  ${report.elapsedSeconds}s  ` +
+      `${report.flowsPerSecond} flows/s  ${report.requestsPerSecond} req/s\n`
+  );
+  console.table(report.steps);
+}
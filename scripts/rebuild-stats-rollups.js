@@ -0,0 +1,22 @@
+// Rebuilds stats_rollups from payments/users (backfill after migration 006, or after manual data fixes).
+// Run: npm run stats:rebuild
+import dotenv from 'dotenv';
+import { createDbPool } from '../db.js';
+import { rebuildRollups } from '../statsRollups.js';
+
+dotenv.config();
+
+const db = createDbPool({ connectionLimit: 1 });
+const conn = await db.getConnection();
+try {
+  const started = Date.now();
+  await rebuildRollups(conn);
+  const [[{ n }]] = await conn.query('SELECT COUNT(*) AS n FROM stats_rollups');
+  console.log(`✅ stats_rollups rebuilt: ${n} rows in ${Date.now() - started} ms`);
+} catch (err) {
+  console.error('❌ Rollup rebuild failed:', err.message);
+  process.exitCode = 1;
+} finally {
+  conn.release();
+  await db.end();
+}
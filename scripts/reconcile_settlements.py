@@ -0,0 +1,329 @@
+"""Reconciles Razorpay settlement CSV exports against the payments table.
+
+    python scripts/reconcile_settlements.py settlements-2024-03.csv --report recon-2024-03.csv
+    python scripts/reconcile_settlements.py march.csv --from 2024-03-01 --to 2024-04-01 --backfill-invoices
+
+The CSV is streamed row by row into settlement_staging (database/migrations/009_settlement_staging.sql)
+with batched multi-row INSERTs, then every check is a single set-based query joining on
+payments.uk_razorpay_payment. Detail rows are streamed from the server straight into the report CSV,
+so memory stays flat however large the file is. Uses the same MYSQL_* settings (.env) as server1.js.
+
+Reported categories:
+  missing_in_db          settled by Razorpay, no payments row
+  duplicate_in_file      the same payment id on more than one settlement line
+  amount_mismatch        settlement amount differs from payments.amount
+  status_mismatch        settled, but payments.status is not 'success'
+  missing_in_settlement  successful payment in --from/--to with no settlement line (only with a range)
+"""
+
+import argparse
+import csv
+import datetime
+import os
+import sys
+import time
+import uuid
+from decimal import Decimal, InvalidOperation
+
+import mysql.connector
+from dotenv import load_dotenv
+
+BATCH = 5000
+FETCH = 5000
+MAX_AMOUNT = Decimal('9999999999.99')  # settlement_staging.amount is DECIMAL(12, 2)
+
+# Razorpay export headers vary by report (settlement recon vs. payments export); first match wins.
+ID_COLUMNS = ('entity_id', 'payment_id', 'razorpay_payment_id', 'id')
+AMOUNT_COLUMNS = ('amount', 'credit')
+SETTLEMENT_COLUMNS = ('settlement_id',)
+SETTLED_AT_COLUMNS = ('settled_at', 'settled_on', 'settlement_date')
+
+REPORT_FIELDS = (
+    'category',
+    'razorpay_payment_id',
+    'payment_row_id',
+    'db_amount',
+    'settlement_amount',
+    'settlement_lines',
+    'detail',
+)
+
+
+def connect():
+    return mysql.connector.connect(
+        host=os.environ.get('MYSQL_HOST') or 'localhost',
+        user=os.environ.get('MYSQL_USER') or 'root',
+        password=os.environ.get('MYSQL_PASSWORD') or '',
+        database=os.environ.get('MYSQL_DB') or 'swagatham_foundation',
+        autocommit=True,
+    )
+
+
+def pick_column(header, explicit, candidates, required=True):
+    lowered = {h.strip().lower(): h for h in header}
+    if explicit:
+        if explicit.lower() not in lowered:
+            raise SystemExit(f'Column {explicit!r} not in CSV header: {", ".join(header)}')
+        return lowered[explicit.lower()]
+    for name in candidates:
+        if name in lowered:
+            return lowered[name]
+    if required:
+        raise SystemExit(f'None of {", ".join(candidates)} found in CSV header: {", ".join(header)}')
+    return None
+
+
+def parse_amount(raw, paise):
+    value = Decimal(raw.replace(',', '').strip())
+    if not value.is_finite():  # 'NaN' / 'Infinity' parse fine but cannot be stored as DECIMAL
+        raise InvalidOperation(raw)
+    if paise:
+        value = value / 100
+    value = value.quantize(Decimal('0.01'))
+    if abs(value) > MAX_AMOUNT:  # would fail the whole batch INSERT mid-load
+        raise InvalidOperation(raw)
+    return value
+
+
+def staged_rows(path, file_no, args, skipped):
+    """Yields staging tuples for payment lines; refunds/adjustments and unparseable lines are counted."""
+    with open(path, newline='', encoding='utf-8-sig') as fh:
+        reader = csv.DictReader(fh)
+        if not reader.fieldnames:
+            raise SystemExit(f'{path}: empty file or missing header row')
+        header = reader.fieldnames
+        id_col = pick_column(header, args.id_column, ID_COLUMNS)
+        amount_col = pick_column(header, args.amount_column, AMOUNT_COLUMNS)
+        type_col = pick_column(header, None, ('type',), required=False)
+        settlement_col = pick_column(header, None, SETTLEMENT_COLUMNS, required=False)
+        settled_col = pick_column(header, None, SETTLED_AT_COLUMNS, required=False)
+
+        for line_no, row in enumerate(reader, start=2):
+            if type_col and (row.get(type_col) or '').strip().lower() not in ('', 'payment'):
+                skipped['non_payment'] += 1
+                continue
+            payment_id = (row.get(id_col) or '').strip()
+            if not payment_id.startswith('pay_'):
+                skipped['no_payment_id'] += 1
+                continue
+            try:
+                amount = parse_amount(row.get(amount_col) or '', args.paise)
+            except InvalidOperation:
+                skipped['bad_amount'] += 1
+                continue
+            yield (
+                file_no,
+                line_no,
+                payment_id,
+                amount,
+                ((row.get(settlement_col) or '').strip()[:64] or None) if settlement_col else None,
+                ((row.get(settled_col) or '').strip()[:32] or None) if settled_col else None,
+            )
+
+
+def load_staging(conn, run_id, file_no, path, args):
+    skipped = {'non_payment': 0, 'no_payment_id': 0, 'bad_amount': 0}
+    sql = (
+        'INSERT INTO settlement_staging '
+        '(run_id, file_no, line_no, razorpay_payment_id, amount, settlement_id, settled_at) '
+        'VALUES (%s, %s, %s, %s, %s, %s, %s)'
+    )
+    cur = conn.cursor()
+    batch = []
+    loaded = 0
+    try:
+        for row in staged_rows(path, file_no, args, skipped):
+            batch.append((run_id, *row))
+            if len(batch) >= BATCH:
+                cur.executemany(sql, batch)  # rewritten by the connector into one multi-row INSERT
+                loaded += len(batch)
+                batch = []
+        if batch:
+            cur.executemany(sql, batch)
+            loaded += len(batch)
+    except mysql.connector.Error as err:
+        if err.errno == 1146:  # ER_NO_SUCH_TABLE
+            raise SystemExit(
+                'settlement_staging table missing — run database/migrations/009_settlement_staging.sql'
+            )
+        raise
+    finally:
+        cur.close()
+    return loaded, skipped
+
+
+# Each query yields rows shaped like REPORT_FIELDS minus the category. Lines are reported as
+# <file>:<line>, where <file> is the 1-based position of the CSV on the command line.
+CHECKS = {
+    'missing_in_db': """
+        SELECT s.razorpay_payment_id, NULL, NULL, SUM(s.amount), COUNT(*), MIN(s.settlement_id)
+        FROM settlement_staging s
+        LEFT JOIN payments p ON p.razorpay_payment_id = s.razorpay_payment_id
+        WHERE s.run_id = %(run_id)s AND p.id IS NULL
+        GROUP BY s.razorpay_payment_id
+    """,
+    'duplicate_in_file': """
+        SELECT s.razorpay_payment_id, MIN(p.id), MIN(p.amount), SUM(s.amount), COUNT(*),
+               GROUP_CONCAT(CONCAT(s.file_no, ':', s.line_no) ORDER BY s.file_no, s.line_no SEPARATOR ' ')
+        FROM settlement_staging s
+        LEFT JOIN payments p ON p.razorpay_payment_id = s.razorpay_payment_id
+        WHERE s.run_id = %(run_id)s
+        GROUP BY s.razorpay_payment_id
+        HAVING COUNT(*) > 1
+    """,
+    'amount_mismatch': """
+        SELECT s.razorpay_payment_id, p.id, p.amount, s.amount, 1, CONCAT(s.file_no, ':', s.line_no)
+        FROM settlement_staging s
+        JOIN payments p ON p.razorpay_payment_id = s.razorpay_payment_id
+        WHERE s.run_id = %(run_id)s AND p.amount <> s.amount
+    """,
+    'status_mismatch': """
+        SELECT s.razorpay_payment_id, p.id, p.amount, SUM(s.amount), COUNT(*), MIN(p.status)
+        FROM settlement_staging s
+        JOIN payments p ON p.razorpay_payment_id = s.razorpay_payment_id
+        WHERE s.run_id = %(run_id)s AND p.status <> 'success'
+        GROUP BY s.razorpay_payment_id, p.id, p.amount
+    """,
+    'missing_in_settlement': """
+        SELECT p.razorpay_payment_id, p.id, p.amount, NULL, 0, p.payment_date
+        FROM payments p
+        WHERE p.status = 'success' AND p.payment_date >= %(from)s AND p.payment_date < %(to)s
+          AND NOT EXISTS (
+            SELECT 1 FROM settlement_staging s
+            WHERE s.run_id = %(run_id)s AND s.razorpay_payment_id = p.razorpay_payment_id
+          )
+    """,
+}
+
+
+def run_checks(conn, params, writer):
+    counts = {}
+    for category, sql in CHECKS.items():
+        if category == 'missing_in_settlement' and not params.get('from'):
+            continue
+        # Unbuffered: rows come off the wire in FETCH-sized chunks instead of materializing the result.
+        cur = conn.cursor(buffered=False)
+        try:
+            cur.execute(sql, params)
+            n = 0
+            while True:
+                rows = cur.fetchmany(FETCH)
+                if not rows:
+                    break
+                n += len(rows)
+                if writer:
+                    writer.writerows((category, *row) for row in rows)
+            counts[category] = n
+        finally:
+            cur.close()
+    return counts
+
+
+def backfill_invoices(conn, run_id):
+    """Assigns SWG-<year>-<id> (same format as POST /api/payment) to matched payments that lack one."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """SELECT MIN(p.id), MAX(p.id) FROM settlement_staging s
+               JOIN payments p ON p.razorpay_payment_id = s.razorpay_payment_id
+               WHERE s.run_id = %s AND p.invoice_number IS NULL""",
+            (run_id,),
+        )
+        lo, hi = cur.fetchone()
+        if lo is None:
+            return 0
+        updated = 0
+        # Walk the primary key in fixed windows so each UPDATE holds row locks briefly.
+        for start in range(lo, hi + 1, BATCH):
+            cur.execute(
+                """UPDATE payments p
+                   JOIN settlement_staging s
+                     ON s.run_id = %s AND s.razorpay_payment_id = p.razorpay_payment_id
+                   SET p.invoice_number = CONCAT('SWG-', YEAR(p.payment_date), '-', LPAD(p.id, 6, '0'))
+                   WHERE p.id BETWEEN %s AND %s AND p.invoice_number IS NULL AND p.status = 'success'""",
+                (run_id, start, start + BATCH - 1),
+            )
+            updated += cur.rowcount
+        return updated
+    finally:
+        cur.close()
+
+
+def clear_staging(conn, run_id):
+    cur = conn.cursor()
+    try:
+        while True:
+            cur.execute('DELETE FROM settlement_staging WHERE run_id = %s LIMIT %s', (run_id, BATCH * 4))
+            if cur.rowcount == 0:
+                break
+    finally:
+        cur.close()
+
+
+def parse_args(argv):
+    p = argparse.ArgumentParser(description='Reconcile Razorpay settlement CSVs against payments.')
+    p.add_argument('csv', nargs='+', help='settlement export(s); several files are staged as one run')
+    p.add_argument('--report', help='write detail rows to this CSV (summary only if omitted)')
+    p.add_argument('--from', dest='date_from', help='YYYY-MM-DD; with --to, also list unsettled payments')
+    p.add_argument('--to', dest='date_to', help='YYYY-MM-DD, exclusive')
+    p.add_argument('--backfill-invoices', action='store_true', help='assign missing invoice_number to matched payments')
+    p.add_argument('--id-column', help='CSV column holding the pay_… id (auto-detected by default)')
+    p.add_argument('--amount-column', help='CSV column holding the gross amount (auto-detected by default)')
+    p.add_argument('--paise', action='store_true', help='amounts in the CSV are in paise, not rupees')
+    p.add_argument('--keep-staging', action='store_true', help='leave staged rows (run_id is printed) for ad-hoc SQL')
+    args = p.parse_args(argv)
+    if bool(args.date_from) != bool(args.date_to):
+        p.error('--from and --to go together')
+    # MySQL compares against a malformed date without complaint, so check the format here.
+    for flag, value in (('--from', args.date_from), ('--to', args.date_to)):
+        if value:
+            try:
+                datetime.date.fromisoformat(value)
+            except ValueError:
+                p.error(f'{flag} must be a YYYY-MM-DD date, got {value!r}')
+    return args
+
+
+def main(argv=None):
+    load_dotenv()
+    args = parse_args(argv)
+    run_id = uuid.uuid4().hex
+    started = time.monotonic()
+    conn = connect()
+    try:
+        loaded = 0
+        for file_no, path in enumerate(args.csv, start=1):
+            n, skipped = load_staging(conn, run_id, file_no, path, args)
+            loaded += n
+            ignored = ', '.join(f'{k}={v}' for k, v in skipped.items() if v)
+            print(f'Staged {n} payment lines from {path} (file {file_no})' + (f', skipped {ignored}' if ignored else ''))
+
+        params = {'run_id': run_id, 'from': args.date_from, 'to': args.date_to}
+        if args.report:
+            with open(args.report, 'w', newline='', encoding='utf-8') as fh:
+                writer = csv.writer(fh)
+                writer.writerow(REPORT_FIELDS)
+                counts = run_checks(conn, params, writer)
+        else:
+            counts = run_checks(conn, params, None)
+
+        backfilled = backfill_invoices(conn, run_id) if args.backfill_invoices else None
+
+        print(f'\nReconciled {loaded} settlement lines in {time.monotonic() - started:.1f}s (run {run_id})')
+        for category, n in counts.items():
+            print(f'  {category:<22} {n}')
+        if backfilled is not None:
+            print(f'  {"invoices_backfilled":<22} {backfilled}')
+        if args.report:
+            print(f'Details written to {args.report}')
+        return 1 if any(counts.values()) else 0
+    finally:
+        try:
+            if not args.keep_staging:
+                clear_staging(conn, run_id)
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+// Minimal local SMTP stand-in for testing the receipt outbox: accepts any login and message, logs a summary.
+// Run: npm run smtp:sink   then set SMTP_HOST=127.0.0.1 SMTP_PORT=2525 SMTP_USER=test SMTP_PASS=test
+import net from 'net';
+
+const PORT = Number(process.env.SMTP_SINK_PORT || 2525);
+let received = 0;
+
+net
+  .createServer((socket) => {
+    let buffer = '';
+    let inData = false;
+    let authStep = 0;
+    let message = '';
+    const reply = (line) => socket.write(`${line}\r\n`);
+    reply('220 smtp-sink ready');
+
+    socket.on('data', (chunk) => {
+      buffer += chunk.toString('utf8');
+      let idx;
+      while ((idx = buffer.indexOf('\r\n')) !== -1) {
+        const line = buffer.slice(0, idx);
+        buffer = buffer.slice(idx + 2);
+        if (inData) {
+          if (line === '.') {
+            inData = false;
+            received += 1;
+            const subject = /^Subject: (.*)$/im.exec(message)?.[1] || '(no subject)';
+            console.log(`[smtp-sink] #${received} ${subject} (${message.length} bytes)`);
+            message = '';
+            reply('250 OK queued');
+          } else {
+            message += `${line}\n`;
+          }
+          continue;
+        }
+        if (authStep > 0) {
+          authStep -= 1;
+          reply(authStep > 0 ? '334 UGFzc3dvcmQ6' : '235 Authenticated');
+          continue;
+        }
+        const cmd = line.split(' ')[0].toUpperCase();
+        if (cmd === 'EHLO') {
+          reply('250-smtp-sink');
+          reply('250-AUTH PLAIN LOGIN');
+          reply('250 SIZE 10485760');
+        } else if (cmd === 'HELO') reply('250 smtp-sink');
+        else if (cmd === 'AUTH') {
+          if (/^AUTH PLAIN \S+/i.test(line)) reply('235 Authenticated');
+          else if (/^AUTH LOGIN \S+/i.test(line)) {
+            authStep = 1;
+            reply('334 UGFzc3dvcmQ6');
+          } else {
+            authStep = /^AUTH LOGIN/i.test(line) ? 2 : 1;
+            reply(authStep === 2 ? '334 VXNlcm5hbWU6' : '334 ');
+          }
+        } else if (cmd === 'DATA') {
+          inData = true;
+          reply('354 End data with <CR><LF>.<CR><LF>');
+        } else if (cmd === 'QUIT') {
+          reply('221 Bye');
+          socket.end();
+        } else reply('250 OK');
+      }
+    });
+    socket.on('error', () => {});
+  })
+  .listen(PORT, '127.0.0.1', () => console.log(`[smtp-sink] listening on 127.0.0.1:${PORT}`));
@@ -1,13 +1,22 @@
 import express from 'express';
 import cors from 'cors';
-import mysql from 'mysql2/promise';
+import { createHash } from 'crypto';
 import jwt from 'jsonwebtoken';
 import dotenv from 'dotenv';
 import twilio from 'twilio';
 import helmet from 'helmet';
 import morgan from 'morgan';
-import rateLimit from 'express-rate-limit';
-import { sendDonationReceiptEmail } from './receiptEmail.js';
+import { isMailerConfigured, sendDonationReceiptEmail } from './receiptEmail.js';
+import { createDbPool } from './db.js';
+import { enqueueEmail, startEmailDispatcher } from './emailOutbox.js';
+import { createOtpStore, otpRateLimit } from './otpStore.js';
+import { parseExportQuery, streamDonationExport } from './donationExport.js';
+import { LruCache } from './lruCache.js';
+import { instrumentPool, metricsPrometheus, metricsSnapshot, routeMetrics, timeExternal } from './metrics.js';
+import { NotificationHub } from './notificationHub.js';
+import { decodeKeysetCursor, encodeKeysetCursor, pageLimit } from './pagination.js';
+import { readStats, recordDonationRollup, recordSignupRollup } from './statsRollups.js';
+import { invalidateProfile, loadPaymentsPage, loadUserProfile, sendWithEtag } from './userProfile.js';
 
 // Load env variables
 dotenv.config();
@@ -64,28 +73,14 @@ app.use(
   })
 );
 app.use(morgan('dev'));
+app.use(routeMetrics());
 app.use(express.json());
 app.use(express.urlencoded({ extended: true }));
 
-// Rate limiting (prevent OTP spam)
-const otpLimiter = rateLimit({
-  windowMs: 15 * 60 * 1000, // 15 minutes
-  max: 5, // Limit each IP to 5 OTP requests per windowMs
-  message: 'Too many OTP requests from this IP, please try again later'
-});
-
 // MySQL pool
 let db;
 try {
-  db = await mysql.createPool({
-    host: process.env.MYSQL_HOST || 'localhost',
-    user: process.env.MYSQL_USER || 'root',
-    password: process.env.MYSQL_PASSWORD || '',
-    database: process.env.MYSQL_DB || 'swagatham_foundation',
-    waitForConnections: true,
-    connectionLimit: 10,
-    queueLimit: 0,
-  });
+  db = instrumentPool(createDbPool());
   const testConn = await db.getConnection();
   testConn.release();
   console.log('✅ MySQL pool ready:', process.env.MYSQL_DB || 'swagatham_foundation');
@@ -104,22 +99,75 @@ function getTwilio() {
   return twilioClient;
 }
 
-// OTP store (in-memory, use Redis in production)
-const otpStore = new Map();
+// OTP store + send limits (per IP and per phone). OTP_STORE=mysql shares them across API processes.
+// Behind a load balancer set TRUST_PROXY (hop count, `true`, or subnets such as `loopback, 10.0.0.0/8`)
+// so req.ip is the client from X-Forwarded-For; otherwise every client shares the balancer's IP bucket.
+const TRUST_PROXY = process.env.TRUST_PROXY;
+if (TRUST_PROXY) {
+  const hops = /^\d+$/.test(TRUST_PROXY) ? Number(TRUST_PROXY) : null;
+  app.set('trust proxy', hops ?? (TRUST_PROXY === 'true' ? true : TRUST_PROXY === 'false' ? false : TRUST_PROXY));
+}
+const OTP_TTL_MS = 5 * 60 * 1000;
+const OTP_MAX_ATTEMPTS = 5;
+const otpStore = await createOtpStore(db);
+const otpLimiter = otpRateLimit(otpStore);
+console.log(`✅ OTP store: ${otpStore.kind}`);
+
+// Receipt emails are queued in email_outbox with the payment and sent in the background.
+const emailDispatcher = startEmailDispatcher(db);
+
+// Pushes new user_notifications rows to connected SSE streams.
+const notificationHub = new NotificationHub(db);
 
 function generateOTP() {
   return Math.floor(100000 + Math.random() * 900000).toString();
 }
 
-function generateToken(phone) {
-  return jwt.sign({ phone, typ: 'user' }, JWT_SECRET, { expiresIn: '24h' });
+// User tokens carry the users.id (`uid`) so handlers never look it up by phone.
+function generateToken(phone, userId) {
+  return jwt.sign({ phone, uid: userId, typ: 'user' }, JWT_SECRET, { expiresIn: '24h' });
 }
 
 function generateAdminToken(phone) {
   return jwt.sign({ phone, typ: 'admin' }, JWT_SECRET, { expiresIn: '8h' });
 }
 
-function authenticateToken(req, res, next) {
+// phone → users.id, for tokens issued before `uid` was added to the claims.
+const userIdByPhone = new LruCache({ max: 50000, ttlMs: 10 * 60 * 1000 });
+
+async function userIdForPhone(phone) {
+  const cached = userIdByPhone.get(phone);
+  if (cached) return cached;
+  const [rows] = await db.execute('SELECT id FROM users WHERE phone = ?', [phone]);
+  if (rows.length === 0) return null;
+  return userIdByPhone.set(phone, rows[0].id);
+}
+
+// admin_phones is tiny: keep the whole set and reload it every ADMIN_PHONES_TTL_MS, so rows added in SQL
+// take effect within a minute in every process.
+const ADMIN_PHONES_TTL_MS = 60 * 1000;
+let adminPhones = null;
+let adminPhonesLoadedAt = 0;
+let adminPhonesLoading = null;
+
+async function isAdminPhone(phone) {
+  if (!adminPhones || Date.now() - adminPhonesLoadedAt > ADMIN_PHONES_TTL_MS) {
+    adminPhonesLoading ||= db
+      .execute('SELECT phone FROM admin_phones')
+      .then(([rows]) => {
+        adminPhones = new Set(rows.map((r) => r.phone));
+        adminPhonesLoadedAt = Date.now();
+      })
+      .finally(() => {
+        adminPhonesLoading = null;
+      });
+    await adminPhonesLoading;
+  }
+  return adminPhones.has(phone);
+}
+
+// Sets req.user (phone) and req.userId. Legacy phone-only tokens resolve the id through userIdByPhone.
+async function authenticateToken(req, res, next) {
   const authHeader = req.headers['authorization'];
   const token = authHeader && authHeader.split(' ')[1]; // Bearer TOKEN
   
@@ -127,19 +175,33 @@ function authenticateToken(req, res, next) {
     return res.status(401).json({ success: false, error: 'Token is missing' });
   }
 
+  let decoded;
   try {
-    const decoded = jwt.verify(token, JWT_SECRET);
-    if (decoded.typ === 'admin') {
-      return res.status(403).json({ success: false, error: 'Use a user session token' });
-    }
-    if (!decoded.phone) {
-      return res.status(401).json({ success: false, error: 'Token is invalid' });
-    }
-    req.user = decoded.phone;
-    next();
+    decoded = jwt.verify(token, JWT_SECRET);
   } catch (error) {
     return res.status(401).json({ success: false, error: 'Token is invalid' });
   }
+  if (decoded.typ === 'admin') {
+    return res.status(403).json({ success: false, error: 'Use a user session token' });
+  }
+  if (!decoded.phone) {
+    return res.status(401).json({ success: false, error: 'Token is invalid' });
+  }
+  req.user = decoded.phone;
+
+  if (Number.isInteger(decoded.uid) && decoded.uid > 0) {
+    req.userId = decoded.uid;
+    return next();
+  }
+  try {
+    req.userId = await userIdForPhone(decoded.phone);
+  } catch (err) {
+    return next(err);
+  }
+  if (!req.userId) {
+    return res.status(404).json({ success: false, error: 'User not found' });
+  }
+  next();
 }
 
 function authenticateAdmin(req, res, next) {
@@ -178,12 +240,25 @@ app.get('/health', async (req, res) => {
   }
 });
 
+// Latency metrics (this process). Prometheus text by default, ?format=json for a summary with p50/p95/p99.
+// Set METRICS_TOKEN to require `Authorization: Bearer <token>`; without it the endpoint is dev-only.
+app.get('/metrics', (req, res) => {
+  const expected = process.env.METRICS_TOKEN;
+  if (expected ? req.headers['authorization'] !== `Bearer ${expected}` : isProd) {
+    return res.status(404).json({ success: false, error: 'Endpoint not found' });
+  }
+  res.set('Cache-Control', 'no-store');
+  if (req.query.format === 'json') return res.json(metricsSnapshot());
+  res.type('text/plain; version=0.0.4').send(metricsPrometheus());
+});
+
 // Send OTP — always logs OTP to server console (dev/testing). Optional Twilio SMS when configured.
 app.post('/api/send-otp', otpLimiter, async (req, res) => {
   try {
-    const { phoneNumber } = req.body;
+    // Clients may send the number as JSON; key the store (and limiter) by one string form.
+    const phoneNumber = req.body.phoneNumber == null ? '' : String(req.body.phoneNumber);
 
-    if (!phoneNumber || !/^[6-9]\d{9}$/.test(phoneNumber)) {
+    if (!/^[6-9]\d{9}$/.test(phoneNumber)) {
       return res.status(400).json({
         success: false,
         error: 'Invalid Indian phone number (10 digits starting with 6-9)',
@@ -191,10 +266,7 @@ app.post('/api/send-otp', otpLimiter, async (req, res) => {
     }
 
     const otp = generateOTP();
-    otpStore.set(phoneNumber, {
-      otp,
-      expiresAt: Date.now() + 5 * 60 * 1000,
-    });
+    await otpStore.save(phoneNumber, otp, OTP_TTL_MS);
 
     console.log(
       `\n┌─────────────────────────────────────────────\n│ [OTP] ${phoneNumber}  →  ${otp}  (valid 5 min)\n└─────────────────────────────────────────────\n`
@@ -205,11 +277,13 @@ app.post('/api/send-otp', otpLimiter, async (req, res) => {
     const fromNum = process.env.TWILIO_PHONE_NUMBER;
     if (client && fromNum) {
       try {
-        await client.messages.create({
-          body: `Your OTP for Swagatham Foundation is: ${otp}`,
-          from: fromNum,
-          to: `+91${phoneNumber}`,
-        });
+        await timeExternal('twilio.sms', () =>
+          client.messages.create({
+            body: `Your OTP for Swagatham Foundation is: ${otp}`,
+            from: fromNum,
+            to: `+91${phoneNumber}`,
+          })
+        );
         smsSent = true;
       } catch (twilioErr) {
         console.warn('[OTP] Twilio SMS failed (SMS optional):', twilioErr.message || twilioErr);
@@ -237,8 +311,9 @@ app.post('/api/send-otp', otpLimiter, async (req, res) => {
 // Verify OTP endpoint
 app.post('/api/verify-otp', async (req, res) => {
   try {
-    const { phoneNumber, otp } = req.body;
-    
+    const phoneNumber = req.body.phoneNumber == null ? '' : String(req.body.phoneNumber);
+    const { otp } = req.body;
+
     // Validate input
     if (!phoneNumber || !otp) {
       return res.status(400).json({ 
@@ -247,42 +322,42 @@ app.post('/api/verify-otp', async (req, res) => {
       });
     }
 
-    const record = otpStore.get(phoneNumber);
-    if (!record || Date.now() > record.expiresAt) {
-      otpStore.delete(phoneNumber);
+    const result = await otpStore.verify(phoneNumber, String(otp), OTP_MAX_ATTEMPTS);
+    if (result === 'expired') {
       return res.status(400).json({ 
         success: false, 
         error: 'OTP expired or not requested' 
       });
     }
+
+    if (result === 'locked') {
+      return res.status(429).json({
+        success: false,
+        error: 'Too many incorrect attempts — request a new OTP',
+      });
+    }
     
-    if (record.otp !== otp) {
+    if (result !== 'ok') {
       return res.status(400).json({ 
         success: false, 
         error: 'Invalid OTP' 
       });
     }
 
-    otpStore.delete(phoneNumber);
+    if (await isAdminPhone(phoneNumber)) {
+      const adminToken = generateAdminToken(phoneNumber);
+      return res.json({
+        success: true,
+        message: 'Admin OTP verified',
+        token: adminToken,
+        userType: 'admin',
+        profileComplete: true,
+      });
+    }
+
     const conn = await db.getConnection();
 
     try {
-      const [adminRows] = await conn.execute(
-        'SELECT id FROM admin_phones WHERE phone = ?',
-        [phoneNumber]
-      );
-
-      if (adminRows.length > 0) {
-        const adminToken = generateAdminToken(phoneNumber);
-        return res.json({
-          success: true,
-          message: 'Admin OTP verified',
-          token: adminToken,
-          userType: 'admin',
-          profileComplete: true,
-        });
-      }
-
       const [users] = await conn.execute(
         'SELECT id, COALESCE(otp_verified, FALSE) as otp_verified, COALESCE(profile_complete, FALSE) as profile_complete FROM users WHERE phone = ?',
         [phoneNumber]
@@ -290,11 +365,16 @@ app.post('/api/verify-otp', async (req, res) => {
 
       let profileComplete = false;
       let otpVerified = false;
+      let userId;
 
       if (users.length === 0) {
-        await conn.execute('INSERT INTO users (phone, otp_verified) VALUES (?, TRUE)', [phoneNumber]);
+        const [ins] = await conn.execute('INSERT INTO users (phone, otp_verified) VALUES (?, TRUE)', [phoneNumber]);
+        userId = ins.insertId;
+        await recordSignupRollup(conn);
+        invalidateStatsCache();
         otpVerified = true;
       } else {
+        userId = users[0].id;
         profileComplete = !!users[0].profile_complete;
         otpVerified = !!users[0].otp_verified;
         if (!otpVerified) {
@@ -302,7 +382,8 @@ app.post('/api/verify-otp', async (req, res) => {
         }
       }
 
-      const token = generateToken(phoneNumber);
+      userIdByPhone.set(phoneNumber, userId);
+      const token = generateToken(phoneNumber, userId);
       res.json({
         success: true,
         message: 'OTP verified successfully',
@@ -323,59 +404,35 @@ app.post('/api/verify-otp', async (req, res) => {
   }
 });
 
-// Get user profile endpoint
+// Get user profile endpoint — cached aggregate, first page of payments (see GET /api/user/payments)
 app.get('/api/user/profile', authenticateToken, async (req, res) => {
   try {
-    const phone = req.user;
-    const conn = await db.getConnection();
-    
-    try {
-      const [userData] = await conn.execute(
-        'SELECT * FROM users WHERE phone = ?', 
-        [phone]
-      );
-      
-      if (userData.length === 0) {
-        return res.status(404).json({ 
-          success: false, 
-          error: 'User not found' 
-        });
-      }
-
-      const user = userData[0];
-      const [family] = await conn.execute(
-        'SELECT name, relation, gender, dob FROM family_members WHERE user_id = ?', 
-        [user.id]
-      );
-      
-      const [payments] = await conn.execute(
-        'SELECT amount, razorpay_payment_id, status, payment_date, tax_exemption, invoice_number FROM payments WHERE user_id = ? ORDER BY payment_date DESC',
-        [user.id]
-      );
-      
-      const [kyc] = await conn.execute(
-        'SELECT pan_number, aadhaar_number, kyc_doc_path FROM kyc_documents WHERE user_id = ?', 
-        [user.id]
-      );
-
-      res.json({
-        success: true,
-        user: {
-          name: user.name,
-          email: user.email,
-          phone: user.phone,
-          dob: user.dob,
-          gender: user.gender,
-          address: user.address,
-          familyMembers: family,
-          payments,
-          kycDocuments: kyc.length > 0 ? kyc[0] : null,
-          profileComplete: Boolean(user.profile_complete),
-        },
+    const profile = await loadUserProfile(db, req.userId);
+    if (!profile) {
+      return res.status(404).json({ 
+        success: false, 
+        error: 'User not found' 
       });
-    } finally {
-      conn.release();
     }
+
+    const { user } = profile;
+    sendWithEtag(req, res, {
+      success: true,
+      user: {
+        name: user.name,
+        email: user.email,
+        phone: user.phone,
+        dob: user.dob,
+        gender: user.gender,
+        address: user.address,
+        familyMembers: profile.familyMembers,
+        payments: profile.payments,
+        paymentsNextCursor: profile.paymentsNextCursor,
+        paymentSummary: profile.paymentSummary,
+        kycDocuments: profile.kycDocuments,
+        profileComplete: Boolean(user.profile_complete),
+      },
+    });
   } catch (err) {
     console.error('Profile retrieval error:', err);
     res.status(500).json({ 
@@ -386,10 +443,25 @@ app.get('/api/user/profile', authenticateToken, async (req, res) => {
   }
 });
 
+// Older payment history pages: ?cursor=<paymentsNextCursor>&limit=
+app.get('/api/user/payments', authenticateToken, async (req, res) => {
+  const cursor = req.query.cursor ? decodeKeysetCursor(req.query.cursor) : null;
+  if (req.query.cursor && !cursor) {
+    return res.status(400).json({ success: false, error: 'Invalid cursor' });
+  }
+  try {
+    const page = await loadPaymentsPage(db, req.userId, { cursor, limit: pageLimit(req.query.limit, 20, 100) });
+    res.json({ success: true, ...page });
+  } catch (err) {
+    console.error('Payment history error:', err);
+    res.status(500).json({ success: false, error: 'Failed to load payments' });
+  }
+});
+
 // Update profile endpoint
 app.put('/api/user/profile', authenticateToken, async (req, res) => {
   try {
-    const phone = req.user;
+    const userId = req.userId;
     const data = req.body;
     const requiredFields = ['name', 'email', 'dob', 'gender', 'address', 'familyMembers'];
     
@@ -411,24 +483,19 @@ app.put('/api/user/profile', authenticateToken, async (req, res) => {
     
     try {
       await conn.beginTransaction();
-      
-      const [userRows] = await conn.execute(
-        'SELECT id FROM users WHERE phone = ?', 
-        [phone]
+
+      const [updated] = await conn.execute(
+        'UPDATE users SET name = ?, email = ?, dob = ?, gender = ?, address = ?, profile_complete = TRUE WHERE id = ?', 
+        [data.name, data.email, data.dob, data.gender, data.address, userId]
       );
-      
-      if (userRows.length === 0) {
+
+      if (updated.affectedRows === 0) {
+        await conn.rollback();
         return res.status(404).json({ 
           success: false, 
           error: 'User not found' 
         });
       }
-
-      const userId = userRows[0].id;
-      await conn.execute(
-        'UPDATE users SET name = ?, email = ?, dob = ?, gender = ?, address = ?, profile_complete = TRUE WHERE id = ?', 
-        [data.name, data.email, data.dob, data.gender, data.address, userId]
-      );
       
       // Update family members
       await conn.execute(
@@ -444,6 +511,7 @@ app.put('/api/user/profile', authenticateToken, async (req, res) => {
       }
       
       await conn.commit();
+      invalidateProfile(userId);
       res.json({ 
         success: true, 
         message: 'Profile updated successfully' 
@@ -464,10 +532,9 @@ app.put('/api/user/profile', authenticateToken, async (req, res) => {
   }
 });
 
-// Record payment endpoint — syncs donor name/email to profile, assigns invoice no., emails receipt when SMTP is set
+// Record payment endpoint — syncs donor name/email to profile, assigns invoice no., queues receipt email when SMTP is set
 app.post('/api/payment', authenticateToken, async (req, res) => {
   try {
-    const phone = req.user;
     const { amount, razorpay_payment_id, tax_exemption = false, name, email } = req.body;
 
     const rid =
@@ -501,7 +568,7 @@ app.post('/api/payment', authenticateToken, async (req, res) => {
     try {
       await conn.beginTransaction();
 
-      const [user] = await conn.execute('SELECT id, name, email FROM users WHERE phone = ?', [phone]);
+      const [user] = await conn.execute('SELECT id, name, email FROM users WHERE id = ?', [req.userId]);
 
       if (user.length === 0) {
         await conn.rollback();
@@ -536,6 +603,20 @@ app.post('/api/payment', authenticateToken, async (req, res) => {
       );
 
       const paymentRowId = insertResult.insertId;
+
+      try {
+        await conn.execute(
+          `INSERT INTO user_donation_totals (user_id, payment_count, total_paid) VALUES (?, 1, ?)
+           ON DUPLICATE KEY UPDATE payment_count = payment_count + 1, total_paid = total_paid + VALUES(total_paid)`,
+          [userId, amt]
+        );
+      } catch (totErr) {
+        if (totErr.code === 'ER_NO_SUCH_TABLE') {
+          console.warn('[Payment] user_donation_totals missing — run database/migrations/005_admin_user_listing.sql');
+        } else {
+          throw totErr;
+        }
+      }
       const year = new Date().getFullYear();
       const invoiceNo = `SWG-${year}-${String(paymentRowId).padStart(6, '0')}`;
 
@@ -568,24 +649,45 @@ app.post('/api/payment', authenticateToken, async (req, res) => {
         console.warn('audit_log insert skipped:', auditErr.message);
       }
 
-      await conn.commit();
-
-      let receiptEmailSent = false;
       const receiptTo = donorEmail || user[0].email;
-      if (receiptTo && invoiceNo) {
-        const mailResult = await sendDonationReceiptEmail({
-          to: receiptTo,
-          donorName: donorName || user[0].name || 'Donor',
-          amount: amt,
-          currency: 'INR',
-          razorpayPaymentId: rid,
-          invoiceNo,
-          taxExemption: Boolean(tax_exemption),
-          paymentDate: new Date(),
-        });
-        receiptEmailSent = mailResult.sent;
-      } else if (!receiptTo) {
+      const receipt = {
+        donorName: donorName || user[0].name || 'Donor',
+        amount: amt,
+        currency: 'INR',
+        razorpayPaymentId: rid,
+        invoiceNo,
+        taxExemption: Boolean(tax_exemption),
+        paymentDate: new Date().toISOString(),
+      };
+      let receiptEmailQueued = false;
+      let sendReceiptDirectly = false;
+      if (!receiptTo) {
         console.log('[Receipt] No email on file — skipped (add donor email in payment form).');
+      } else if (!isMailerConfigured()) {
+        console.log(
+          `[Receipt] SMTP not configured — would email ${receiptTo} invoice ${invoiceNo}. Set SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS.`
+        );
+      } else {
+        try {
+          await enqueueEmail(conn, 'donation_receipt', receiptTo, receipt);
+          receiptEmailQueued = true;
+        } catch (outboxErr) {
+          if (outboxErr.code !== 'ER_NO_SUCH_TABLE') throw outboxErr;
+          console.warn('[Payment] email_outbox missing — run database/migrations/007_email_outbox.sql');
+          sendReceiptDirectly = true;
+        }
+      }
+
+      // Shared rollup rows (global/day/month) are the hottest locks here: bump them last, just before commit.
+      await recordDonationRollup(conn, { amount: amt, taxExemption: Boolean(tax_exemption) });
+      await conn.commit();
+      invalidateStatsCache();
+      invalidateProfile(userId);
+      if (receiptEmailQueued) emailDispatcher.kick();
+      if (sendReceiptDirectly) {
+        // Pre-migration fallback: send in the background so the response still doesn't wait on SMTP.
+        sendDonationReceiptEmail({ to: receiptTo, ...receipt }).catch(() => {});
+        receiptEmailQueued = true;
       }
 
       res.json({
@@ -593,7 +695,7 @@ app.post('/api/payment', authenticateToken, async (req, res) => {
         message: 'Payment recorded successfully',
         paymentId: rid,
         invoiceNo,
-        receiptEmailSent,
+        receiptEmailQueued,
       });
     } catch (err) {
       await conn.rollback();
@@ -614,7 +716,7 @@ app.post('/api/payment', authenticateToken, async (req, res) => {
 // KYC submission endpoint
 app.post('/api/kyc', authenticateToken, async (req, res) => {
   try {
-    const phone = req.user;
+    const userId = req.userId;
     const { pan_number, aadhaar_number, dob, kyc_doc_path } = req.body;
 
     if (!pan_number || !aadhaar_number || !dob) {
@@ -627,19 +729,6 @@ app.post('/api/kyc', authenticateToken, async (req, res) => {
     const conn = await db.getConnection();
     
     try {
-      // Get user ID
-      const [user] = await conn.execute(
-        'SELECT id FROM users WHERE phone = ?', 
-        [phone]
-      );
-      
-      if (user.length === 0) {
-        return res.status(404).json({ 
-          success: false, 
-          error: 'User not found' 
-        });
-      }
-
       // Upsert KYC documents with dob
       await conn.execute(
         `INSERT INTO kyc_documents 
@@ -650,8 +739,9 @@ app.post('/api/kyc', authenticateToken, async (req, res) => {
          aadhaar_number = VALUES(aadhaar_number),
          date_of_birth = VALUES(date_of_birth),
          kyc_doc_path = VALUES(kyc_doc_path)`,
-        [user[0].id, pan_number, aadhaar_number, dob, kyc_doc_path || null]
+        [userId, pan_number, aadhaar_number, dob, kyc_doc_path || null]
       );
+      invalidateProfile(userId);
 
       res.json({ 
         success: true, 
@@ -678,35 +768,29 @@ app.post('/api/admin/login', async (req, res) => {
   });
 });
 
-// Admin dashboard stats endpoint
+// Admin dashboard stats — served from stats_rollups, cached in-process and revalidated via ETag.
+// Payments/signups in this process invalidate immediately; other processes within STATS_CACHE_TTL_MS.
+const STATS_CACHE_TTL_MS = Number(process.env.STATS_CACHE_TTL_MS || 15000);
+let statsCache = null;
+
+function invalidateStatsCache() {
+  statsCache = null;
+}
+
 app.get('/api/admin/stats', authenticateAdmin, async (req, res) => {
   try {
-    const conn = await db.getConnection();
-    
-    try {
-      const [userCount] = await conn.execute('SELECT COUNT(*) as count FROM users');
-      const [paymentStats] = await conn.execute('SELECT COUNT(*) as count, SUM(amount) as total FROM payments WHERE status = "success"');
-      const [recentPayments] = await conn.execute(`
-        SELECT p.amount, p.payment_date, u.name, u.phone 
-        FROM payments p 
-        JOIN users u ON p.user_id = u.id 
-        WHERE p.status = 'success' 
-        ORDER BY p.payment_date DESC 
-        LIMIT 10
-      `);
-
-      res.json({
-        success: true,
-        stats: {
-          totalUsers: userCount[0].count,
-          totalPayments: paymentStats[0].count,
-          totalAmount: paymentStats[0].total || 0,
-          recentPayments
-        }
-      });
-    } finally {
-      conn.release();
+    if (!statsCache || statsCache.expiresAt <= Date.now()) {
+      const body = JSON.stringify({ success: true, stats: await readStats(db) });
+      statsCache = {
+        body,
+        etag: `"${createHash('sha1').update(body).digest('base64url')}"`,
+        expiresAt: Date.now() + STATS_CACHE_TTL_MS,
+      };
     }
+    res.set('ETag', statsCache.etag);
+    res.set('Cache-Control', 'private, no-cache');
+    if (req.fresh) return res.status(304).end();
+    res.type('json').send(statsCache.body);
   } catch (err) {
     console.error('Admin stats error:', err);
     res.status(500).json({ 
@@ -717,25 +801,81 @@ app.get('/api/admin/stats', authenticateAdmin, async (req, res) => {
   }
 });
 
+// Paginated user list. Query: cursor, limit (≤200), status=complete|incomplete, q (phone/name prefix), minDonation,
+// withCounts=1 (complete/incomplete totals for the filters, first page only).
 app.get('/api/admin/users', authenticateAdmin, async (req, res) => {
+  const limit = pageLimit(req.query.limit, 50, 200);
+  // `filters` also scope the per-status counts; status and cursor only narrow the page itself.
+  const filters = [];
+  const filterParams = [];
+
+  const q = typeof req.query.q === 'string' ? req.query.q.trim() : '';
+  if (q) {
+    const prefix = `${q.replace(/[\\%_]/g, '\\$&')}%`;
+    filters.push(/^\d+$/.test(q) ? 'u.phone LIKE ?' : 'u.name LIKE ?');
+    filterParams.push(prefix);
+  }
+
+  const minDonation = Number(req.query.minDonation);
+  if (req.query.minDonation && (!Number.isFinite(minDonation) || minDonation < 0)) {
+    return res.status(400).json({ success: false, error: 'Invalid minDonation' });
+  }
+  if (minDonation > 0) {
+    filters.push('t.total_paid >= ?');
+    filterParams.push(minDonation);
+  }
+
+  const where = [...filters];
+  const params = [...filterParams];
+  if (req.query.status === 'complete' || req.query.status === 'incomplete') {
+    where.push('u.profile_complete = ?');
+    params.push(req.query.status === 'complete' ? 1 : 0);
+  }
+  if (req.query.cursor) {
+    const cursor = decodeKeysetCursor(req.query.cursor);
+    if (!cursor) {
+      return res.status(400).json({ success: false, error: 'Invalid cursor' });
+    }
+    where.push('(u.created_at < ? OR (u.created_at = ? AND u.id < ?))');
+    params.push(cursor.at, cursor.at, cursor.id);
+  }
+
   try {
-    const conn = await db.getConnection();
-    try {
-      const [rows] = await conn.execute(`
-        SELECT u.id, u.phone, u.name, u.email, u.dob, u.gender, u.address,
+    const [rows] = await db.query(
+      `SELECT u.id, u.phone, u.name, u.email, u.dob, u.gender, u.address,
           COALESCE(u.profile_complete, 0) AS profile_complete,
           u.created_at,
-          (SELECT COUNT(*) FROM payments p WHERE p.user_id = u.id AND p.status = 'success') AS payment_count,
-          (SELECT COALESCE(SUM(amount), 0) FROM payments p WHERE p.user_id = u.id AND p.status = 'success') AS total_paid
+          COALESCE(t.payment_count, 0) AS payment_count,
+          COALESCE(t.total_paid, 0) AS total_paid
         FROM users u
-        ORDER BY u.created_at DESC
-      `);
-      const complete = rows.filter((r) => r.profile_complete);
-      const incomplete = rows.filter((r) => !r.profile_complete);
-      res.json({ success: true, users: rows, complete, incomplete });
-    } finally {
-      conn.release();
+        LEFT JOIN user_donation_totals t ON t.user_id = u.id
+        ${where.length ? `WHERE ${where.join(' AND ')}` : ''}
+        ORDER BY u.created_at DESC, u.id DESC
+        LIMIT ?`,
+      [...params, limit + 1]
+    );
+    const hasMore = rows.length > limit;
+    const users = hasMore ? rows.slice(0, limit) : rows;
+    const out = {
+      success: true,
+      users,
+      nextCursor: hasMore ? encodeKeysetCursor(users[users.length - 1].created_at, users[users.length - 1].id) : null,
+    };
+
+    // Per-status counts are opt-in (withCounts=1, first page only): one call covers both dashboard lists.
+    if (!req.query.cursor && (req.query.withCounts === '1' || req.query.withCounts === 'true')) {
+      const [counts] = await db.query(
+        `SELECT COALESCE(u.profile_complete, 0) AS complete, COUNT(*) AS count
+          FROM users u
+          ${minDonation > 0 ? 'LEFT JOIN user_donation_totals t ON t.user_id = u.id' : ''}
+          ${filters.length ? `WHERE ${filters.join(' AND ')}` : ''}
+          GROUP BY complete`,
+        filterParams
+      );
+      out.counts = { complete: 0, incomplete: 0 };
+      for (const c of counts) out.counts[c.complete ? 'complete' : 'incomplete'] += Number(c.count);
     }
+    res.json(out);
   } catch (err) {
     console.error('Admin users list error:', err);
     res.status(500).json({ success: false, error: 'Failed to list users' });
@@ -748,44 +888,61 @@ app.get('/api/admin/users/:id', authenticateAdmin, async (req, res) => {
     return res.status(400).json({ success: false, error: 'Invalid user id' });
   }
   try {
-    const conn = await db.getConnection();
-    try {
-      const [userData] = await conn.execute('SELECT * FROM users WHERE id = ?', [id]);
-      if (userData.length === 0) {
-        return res.status(404).json({ success: false, error: 'User not found' });
-      }
-      const user = userData[0];
-      const [family] = await conn.execute(
-        'SELECT name, relation, gender, dob FROM family_members WHERE user_id = ?',
-        [id]
-      );
-      const [payments] = await conn.execute(
-        'SELECT amount, razorpay_payment_id, status, payment_date, tax_exemption, invoice_number FROM payments WHERE user_id = ? ORDER BY payment_date DESC',
-        [id]
-      );
-      const [kyc] = await conn.execute(
-        'SELECT pan_number, aadhaar_number, kyc_doc_path FROM kyc_documents WHERE user_id = ?',
-        [id]
-      );
-      res.json({
-        success: true,
-        user: {
-          ...user,
-          profile_complete: Boolean(user.profile_complete),
-          familyMembers: family,
-          payments,
-          kycDocuments: kyc.length > 0 ? kyc[0] : null,
-        },
-      });
-    } finally {
-      conn.release();
+    const profile = await loadUserProfile(db, id);
+    if (!profile) {
+      return res.status(404).json({ success: false, error: 'User not found' });
     }
+    sendWithEtag(req, res, {
+      success: true,
+      user: {
+        ...profile.user,
+        profile_complete: Boolean(profile.user.profile_complete),
+        familyMembers: profile.familyMembers,
+        payments: profile.payments,
+        paymentsNextCursor: profile.paymentsNextCursor,
+        paymentSummary: profile.paymentSummary,
+        kycDocuments: profile.kycDocuments,
+      },
+    });
   } catch (err) {
     console.error('Admin user detail error:', err);
     res.status(500).json({ success: false, error: 'Failed to load user' });
   }
 });
 
+app.get('/api/admin/users/:id/payments', authenticateAdmin, async (req, res) => {
+  const id = parseInt(req.params.id, 10);
+  const cursor = req.query.cursor ? decodeKeysetCursor(req.query.cursor) : null;
+  if (!Number.isFinite(id) || id <= 0 || (req.query.cursor && !cursor)) {
+    return res.status(400).json({ success: false, error: 'Invalid user id or cursor' });
+  }
+  try {
+    const page = await loadPaymentsPage(db, id, { cursor, limit: pageLimit(req.query.limit, 20, 100) });
+    res.json({ success: true, ...page });
+  } catch (err) {
+    console.error('Admin payment history error:', err);
+    res.status(500).json({ success: false, error: 'Failed to load payments' });
+  }
+});
+
+// 80G export: ?fy=2025 (or from/to=YYYY-MM-DD), format=csv|jsonl, taxExempt=true|false. Streams; constant memory.
+app.get('/api/admin/exports/donations', authenticateAdmin, async (req, res) => {
+  const opts = parseExportQuery(req.query);
+  if (opts.error) {
+    return res.status(400).json({ success: false, error: opts.error });
+  }
+  try {
+    await streamDonationExport(res, opts);
+  } catch (err) {
+    console.error('Donation export error:', err);
+    if (!res.headersSent) {
+      res.status(500).json({ success: false, error: 'Export failed' });
+    } else {
+      res.destroy(err);
+    }
+  }
+});
+
 app.post('/api/admin/notifications', authenticateAdmin, async (req, res) => {
   try {
     const { userId, message } = req.body;
@@ -803,6 +960,7 @@ app.post('/api/admin/notifications', authenticateAdmin, async (req, res) => {
         'INSERT INTO user_notifications (user_id, message) VALUES (?, ?)',
         [uid, String(message).trim()]
       );
+      notificationHub.kick();
       res.json({ success: true, id: r.insertId, message: 'Notification sent' });
     } finally {
       conn.release();
@@ -813,52 +971,159 @@ app.post('/api/admin/notifications', authenticateAdmin, async (req, res) => {
   }
 });
 
-app.get('/api/user/notifications', authenticateToken, async (req, res) => {
+// Broadcast one message to an audience: { message, audience: { status: 'all'|'complete'|'incomplete', minDonation } }.
+// Recipients are read and inserted in id-ordered batches of 1000 (one multi-row INSERT per batch).
+app.post('/api/admin/notifications/broadcast', authenticateAdmin, async (req, res) => {
+  const message = req.body.message ? String(req.body.message).trim() : '';
+  const audience = req.body.audience || {};
+  const status = audience.status || 'all';
+  const minDonation = Number(audience.minDonation || 0);
+  if (!message || !['all', 'complete', 'incomplete'].includes(status) || !Number.isFinite(minDonation) || minDonation < 0) {
+    return res.status(400).json({ success: false, error: 'message and a valid audience are required' });
+  }
+
+  const filters = ['u.id > ?'];
+  const params = [];
+  if (status !== 'all') {
+    filters.push('u.profile_complete = ?');
+    params.push(status === 'complete' ? 1 : 0);
+  }
+  if (minDonation > 0) {
+    filters.push('t.total_paid >= ?');
+    params.push(minDonation);
+  }
+
+  // One transaction: a failed batch rolls back the earlier ones, so retrying never double-sends.
+  let conn;
   try {
-    const phone = req.user;
-    const conn = await db.getConnection();
+    conn = await db.getConnection();
+    await conn.beginTransaction();
+    let lastId = 0;
+    let sent = 0;
     try {
-      const [userRows] = await conn.execute('SELECT id FROM users WHERE phone = ?', [phone]);
-      if (userRows.length === 0) {
-        return res.status(404).json({ success: false, error: 'User not found' });
+      for (;;) {
+        const [ids] = await conn.query(
+          `SELECT u.id FROM users u
+           ${minDonation > 0 ? 'JOIN user_donation_totals t ON t.user_id = u.id' : ''}
+           WHERE ${filters.join(' AND ')}
+           ORDER BY u.id
+           LIMIT 1000`,
+          [lastId, ...params]
+        );
+        if (ids.length === 0) break;
+        await conn.query('INSERT INTO user_notifications (user_id, message) VALUES ?', [
+          ids.map((r) => [r.id, message]),
+        ]);
+        sent += ids.length;
+        lastId = ids[ids.length - 1].id;
+        if (ids.length < 1000) break;
       }
-      const userId = userRows[0].id;
-      const [rows] = await conn.execute(
-        'SELECT id, message, read_at, created_at FROM user_notifications WHERE user_id = ? ORDER BY created_at DESC',
-        [userId]
-      );
-      res.json({ success: true, notifications: rows });
-    } finally {
-      conn.release();
+      await conn.commit();
+    } catch (err) {
+      await conn.rollback();
+      throw err;
     }
+    notificationHub.kick();
+    res.json({ success: true, recipients: sent, message: 'Broadcast sent' });
+  } catch (err) {
+    console.error('Admin broadcast error:', err);
+    res.status(500).json({ success: false, error: 'Failed to broadcast notification' });
+  } finally {
+    if (conn) conn.release();
+  }
+});
+
+// Newest-first history: ?cursor=<id>&limit= (≤100), unread=1 for unread only.
+app.get('/api/user/notifications', authenticateToken, async (req, res) => {
+  const limit = pageLimit(req.query.limit, 20, 100);
+  const cursor = req.query.cursor ? parseInt(req.query.cursor, 10) : null;
+  if (req.query.cursor && (!Number.isFinite(cursor) || cursor <= 0)) {
+    return res.status(400).json({ success: false, error: 'Invalid cursor' });
+  }
+  try {
+    const [rows] = await db.query(
+      `SELECT id, message, read_at, created_at FROM user_notifications
+       WHERE user_id = ? ${req.query.unread === '1' ? 'AND read_at IS NULL' : ''} ${cursor ? 'AND id < ?' : ''}
+       ORDER BY id DESC
+       LIMIT ?`,
+      [req.userId, ...(cursor ? [cursor] : []), limit + 1]
+    );
+    const hasMore = rows.length > limit;
+    const notifications = hasMore ? rows.slice(0, limit) : rows;
+    res.json({
+      success: true,
+      notifications,
+      nextCursor: hasMore ? String(notifications[notifications.length - 1].id) : null,
+    });
   } catch (err) {
     console.error('User notifications error:', err);
     res.status(500).json({ success: false, error: 'Failed to load notifications' });
   }
 });
 
+// Served from idx_user_unread (user_id, read_at).
+app.get('/api/user/notifications/unread-count', authenticateToken, async (req, res) => {
+  try {
+    const [rows] = await db.execute(
+      'SELECT COUNT(*) AS count FROM user_notifications WHERE user_id = ? AND read_at IS NULL',
+      [req.userId]
+    );
+    res.json({ success: true, count: Number(rows[0].count) });
+  } catch (err) {
+    console.error('Unread count error:', err);
+    res.status(500).json({ success: false, error: 'Failed to count notifications' });
+  }
+});
+
+// SSE stream of new notifications. ?after=<id> replays anything newer than the client has seen.
+app.get('/api/user/notifications/stream', authenticateToken, async (req, res) => {
+  const afterId = req.query.after != null ? parseInt(req.query.after, 10) : NaN;
+  try {
+    await notificationHub.subscribe(req.userId, res, afterId);
+  } catch (err) {
+    console.error('Notification stream error:', err);
+    if (!res.headersSent) res.status(500).json({ success: false, error: 'Failed to open stream' });
+    else res.end();
+  }
+});
+
+// Bulk mark-read: { ids: [..] } (≤500) or { all: true }.
+app.put('/api/user/notifications/read', authenticateToken, async (req, res) => {
+  const all = req.body.all === true;
+  const ids = Array.isArray(req.body.ids)
+    ? req.body.ids.map((x) => parseInt(x, 10)).filter((x) => Number.isFinite(x) && x > 0)
+    : [];
+  if (!all && (ids.length === 0 || ids.length > 500)) {
+    return res.status(400).json({ success: false, error: 'Provide ids (1–500) or all: true' });
+  }
+  try {
+    const [r] = all
+      ? await db.execute(
+          'UPDATE user_notifications SET read_at = NOW() WHERE user_id = ? AND read_at IS NULL',
+          [req.userId]
+        )
+      : await db.query(
+          'UPDATE user_notifications SET read_at = NOW() WHERE user_id = ? AND read_at IS NULL AND id IN (?)',
+          [req.userId, ids]
+        );
+    res.json({ success: true, updated: r.affectedRows });
+  } catch (err) {
+    console.error('Bulk mark read error:', err);
+    res.status(500).json({ success: false, error: 'Failed to update' });
+  }
+});
+
 app.put('/api/user/notifications/:id/read', authenticateToken, async (req, res) => {
   try {
-    const phone = req.user;
     const nid = parseInt(req.params.id, 10);
     if (!Number.isFinite(nid) || nid <= 0) {
       return res.status(400).json({ success: false, error: 'Invalid id' });
     }
-    const conn = await db.getConnection();
-    try {
-      const [userRows] = await conn.execute('SELECT id FROM users WHERE phone = ?', [phone]);
-      if (userRows.length === 0) {
-        return res.status(404).json({ success: false, error: 'User not found' });
-      }
-      const userId = userRows[0].id;
-      const [r] = await conn.execute(
-        'UPDATE user_notifications SET read_at = NOW() WHERE id = ? AND user_id = ?',
-        [nid, userId]
-      );
-      res.json({ success: true, updated: r.affectedRows > 0 });
-    } finally {
-      conn.release();
-    }
+    const [r] = await db.execute(
+      'UPDATE user_notifications SET read_at = NOW() WHERE id = ? AND user_id = ?',
+      [nid, req.userId]
+    );
+    res.json({ success: true, updated: r.affectedRows > 0 });
   } catch (err) {
     console.error('Mark notification read error:', err);
     res.status(500).json({ success: false, error: 'Failed to update' });
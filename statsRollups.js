@@ -0,0 +1,125 @@
+// Donation / signup rollups behind /api/admin/stats (table: stats_rollups, migration 006).
+// Rows are keyed by (metric, period_type, period_key, tax_exempt):
+//   period_type 'all' → period_key ''; 'month' → 'YYYY-MM'; 'day' → 'YYYY-MM-DD' (MySQL session time).
+// Writers bump the 'all', current-month and current-day rows inside the caller's transaction.
+
+const DAILY_WINDOW_DAYS = 30;
+const MONTHLY_WINDOW_MONTHS = 12;
+
+const BUMP_SQL = `INSERT INTO stats_rollups (metric, period_type, period_key, tax_exempt, event_count, amount)
+  VALUES
+    (?, 'all', '', ?, 1, ?),
+    (?, 'month', DATE_FORMAT(NOW(), '%Y-%m'), ?, 1, ?),
+    (?, 'day', DATE_FORMAT(NOW(), '%Y-%m-%d'), ?, 1, ?)
+  ON DUPLICATE KEY UPDATE
+    event_count = event_count + VALUES(event_count),
+    amount = amount + VALUES(amount)`;
+
+async function bump(conn, metric, taxExempt, amount) {
+  const t = taxExempt ? 1 : 0;
+  try {
+    await conn.execute(BUMP_SQL, [metric, t, amount, metric, t, amount, metric, t, amount]);
+  } catch (err) {
+    if (err.code !== 'ER_NO_SUCH_TABLE') throw err;
+    console.warn('[Stats] stats_rollups missing — run database/migrations/006_stats_rollups.sql');
+  }
+}
+
+export function recordDonationRollup(conn, { amount, taxExemption }) {
+  return bump(conn, 'donation', taxExemption, amount);
+}
+
+export function recordSignupRollup(conn) {
+  return bump(conn, 'signup', false, 0);
+}
+
+/** Recomputes every rollup row from payments/users. Runs in its own transaction on `conn`. */
+export async function rebuildRollups(conn) {
+  await conn.beginTransaction();
+  try {
+    await conn.query('DELETE FROM stats_rollups');
+    for (const [periodType, keyExpr] of [
+      ['all', "''"],
+      ['month', "DATE_FORMAT(payment_date, '%Y-%m')"],
+      ['day', "DATE_FORMAT(payment_date, '%Y-%m-%d')"],
+    ]) {
+      await conn.query(
+        `INSERT INTO stats_rollups (metric, period_type, period_key, tax_exempt, event_count, amount)
+         SELECT 'donation', ?, ${keyExpr} AS k, tax_exemption, COUNT(*), SUM(amount)
+         FROM payments WHERE status = 'success'
+         GROUP BY k, tax_exemption`,
+        [periodType]
+      );
+      await conn.query(
+        `INSERT INTO stats_rollups (metric, period_type, period_key, tax_exempt, event_count, amount)
+         SELECT 'signup', ?, ${keyExpr.replace('payment_date', 'created_at')} AS k, 0, COUNT(*), 0
+         FROM users
+         GROUP BY k`,
+        [periodType]
+      );
+    }
+    await conn.commit();
+  } catch (err) {
+    await conn.rollback();
+    throw err;
+  }
+}
+
+/** Builds the /api/admin/stats payload from rollups plus the 10 latest payments. */
+export async function readStats(db) {
+  const [rows] = await db.query(
+    `SELECT metric, period_type, period_key, tax_exempt, event_count, amount
+     FROM stats_rollups
+     WHERE period_type = 'all'
+       OR (period_type = 'day' AND period_key >= DATE_FORMAT(CURDATE() - INTERVAL ? DAY, '%Y-%m-%d'))
+       OR (period_type = 'month' AND period_key >= DATE_FORMAT(CURDATE() - INTERVAL ? MONTH, '%Y-%m'))`,
+    [DAILY_WINDOW_DAYS - 1, MONTHLY_WINDOW_MONTHS - 1]
+  );
+  const [recentPayments] = await db.query(`
+    SELECT p.amount, p.payment_date, u.name, u.phone
+    FROM payments p
+    JOIN users u ON p.user_id = u.id
+    WHERE p.status = 'success'
+    ORDER BY p.payment_date DESC
+    LIMIT 10
+  `);
+
+  const stats = {
+    totalUsers: 0,
+    totalPayments: 0,
+    totalAmount: 0,
+    taxExempt: { count: 0, amount: 0 },
+    nonExempt: { count: 0, amount: 0 },
+    daily: {},
+    monthly: {},
+    recentPayments,
+  };
+  for (const r of rows) {
+    const count = Number(r.event_count);
+    const amount = Number(r.amount);
+    if (r.metric === 'signup') {
+      if (r.period_type === 'all') stats.totalUsers += count;
+      continue;
+    }
+    if (r.period_type === 'all') {
+      stats.totalPayments += count;
+      stats.totalAmount += amount;
+      const split = r.tax_exempt ? stats.taxExempt : stats.nonExempt;
+      split.count += count;
+      split.amount += amount;
+    } else {
+      const bucket = r.period_type === 'day' ? stats.daily : stats.monthly;
+      const slot = (bucket[r.period_key] ||= { count: 0, amount: 0, taxExemptAmount: 0 });
+      slot.count += count;
+      slot.amount += amount;
+      if (r.tax_exempt) slot.taxExemptAmount += amount;
+    }
+  }
+  const toSeries = (bucket, key) =>
+    Object.keys(bucket)
+      .sort()
+      .map((k) => ({ [key]: k, ...bucket[k] }));
+  stats.daily = toSeries(stats.daily, 'date');
+  stats.monthly = toSeries(stats.monthly, 'month');
+  return stats;
+}
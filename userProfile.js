@@ -0,0 +1,166 @@
+// Profile read path shared by GET /api/user/profile and GET /api/admin/users/:id.
+// A cache miss is one statement: family, payments page, summary and KYC come back as JSON columns on the user row.
+import { createHash } from 'crypto';
+import { LruCache } from './lruCache.js';
+import { encodeKeysetCursor } from './pagination.js';
+
+export const PROFILE_PAYMENTS_PAGE = 20;
+
+const USER_COLUMNS =
+  'u.id, u.phone, u.name, u.email, u.dob, u.gender, u.address, u.otp_verified, u.profile_complete, u.created_at, u.updated_at';
+
+/** Per-user profile aggregates, keyed by user id. Writers call `invalidateProfile(userId)` after commit. */
+const profileCache = new LruCache({
+  max: Number(process.env.PROFILE_CACHE_MAX || 5000),
+  ttlMs: Number(process.env.PROFILE_CACHE_TTL_MS || 60000),
+});
+
+// userId → { gen, readers } while loads are in flight. A load only caches its result if no invalidation
+// bumped `gen` meanwhile, so a read that raced a write cannot re-insert the pre-write profile.
+const inflight = new Map();
+
+export function invalidateProfile(userId) {
+  const entry = inflight.get(userId);
+  if (entry) entry.gen += 1;
+  profileCache.delete(userId);
+}
+
+function jsonColumn(value) {
+  return typeof value === 'string' ? JSON.parse(value) : value;
+}
+
+// JSON_OBJECT renders DATE/TIMESTAMP as 'YYYY-MM-DD[ hh:mm:ss.ffffff]'; read them back as local-time Dates,
+// matching what mysql2 returns for plain columns.
+function jsonDate(value) {
+  if (!value) return value ?? null;
+  const [day, time = '00:00:00'] = value.split(' ');
+  return new Date(`${day}T${time}`);
+}
+
+function summarizePayments(rows) {
+  const summary = {
+    totalAmount: 0,
+    totalCount: 0,
+    successAmount: 0,
+    successCount: 0,
+    failedCount: 0,
+    pendingCount: 0,
+    taxExemptCount: 0,
+    standardCount: 0,
+  };
+  for (const r of rows) {
+    const count = Number(r.count);
+    const amount = Number(r.amount);
+    summary.totalAmount += amount;
+    summary.totalCount += count;
+    if (r.status === 'success') {
+      summary.successAmount += amount;
+      summary.successCount += count;
+    } else if (r.status === 'failed') {
+      summary.failedCount += count;
+    } else {
+      summary.pendingCount += count;
+    }
+    if (r.tax_exemption) summary.taxExemptCount += count;
+    else summary.standardCount += count;
+  }
+  return summary;
+}
+
+/** Newest-first page of a user's payments after a decoded keyset `cursor`: `{ payments, nextCursor }`. */
+export async function loadPaymentsPage(db, userId, { cursor, limit = PROFILE_PAYMENTS_PAGE } = {}) {
+  const params = [userId];
+  let keyset = '';
+  if (cursor) {
+    keyset = 'AND (payment_date < ? OR (payment_date = ? AND id < ?))';
+    params.push(cursor.at, cursor.at, cursor.id);
+  }
+  const [rows] = await db.query(
+    `SELECT id, amount, razorpay_payment_id, status, payment_date, tax_exemption, invoice_number
+     FROM payments
+     WHERE user_id = ? ${keyset}
+     ORDER BY payment_date DESC, id DESC
+     LIMIT ?`,
+    [...params, limit + 1]
+  );
+  const hasMore = rows.length > limit;
+  const page = hasMore ? rows.slice(0, limit) : rows;
+  const last = page[page.length - 1];
+  return {
+    payments: page.map(({ id, ...p }) => p),
+    nextCursor: hasMore ? encodeKeysetCursor(last.payment_date, last.id) : null,
+  };
+}
+
+/**
+ * Loads user + family + first payments page + payment summary + KYC for user `id` in one round trip.
+ * Returns null when the user does not exist. Results are cached by user id.
+ */
+export async function loadUserProfile(db, id) {
+  const cached = profileCache.get(id);
+  if (cached) return cached;
+
+  const entry = inflight.get(id) || { gen: 0, readers: 0 };
+  entry.readers += 1;
+  inflight.set(id, entry);
+  const gen = entry.gen;
+  let rows;
+  try {
+    [rows] = await db.query(
+      `SELECT ${USER_COLUMNS},
+        (SELECT JSON_ARRAYAGG(JSON_OBJECT('name', f.name, 'relation', f.relation, 'gender', f.gender, 'dob', f.dob))
+          FROM family_members f WHERE f.user_id = ?) AS family_json,
+        (SELECT JSON_ARRAYAGG(JSON_OBJECT(
+            'id', p.id, 'amount', CAST(p.amount AS CHAR), 'razorpay_payment_id', p.razorpay_payment_id,
+            'status', p.status, 'payment_date', p.payment_date, 'tax_exemption', p.tax_exemption,
+            'invoice_number', p.invoice_number))
+          FROM (SELECT id, amount, razorpay_payment_id, status, payment_date, tax_exemption, invoice_number
+                FROM payments WHERE user_id = ?
+                ORDER BY payment_date DESC, id DESC
+                LIMIT ?) p) AS payments_json,
+        (SELECT JSON_ARRAYAGG(JSON_OBJECT('status', s.status, 'tax_exemption', s.tax_exemption, 'count', s.count,
+            'amount', s.amount))
+          FROM (SELECT LOWER(status) AS status, tax_exemption, COUNT(*) AS count, COALESCE(SUM(amount), 0) AS amount
+                FROM payments WHERE user_id = ?
+                GROUP BY LOWER(status), tax_exemption) s) AS summary_json,
+        (SELECT JSON_OBJECT('pan_number', k.pan_number, 'aadhaar_number', k.aadhaar_number,
+            'kyc_doc_path', k.kyc_doc_path)
+          FROM kyc_documents k WHERE k.user_id = ?) AS kyc_json
+       FROM users u
+       WHERE u.id = ?`,
+      [id, id, PROFILE_PAYMENTS_PAGE + 1, id, id, id]
+    );
+  } finally {
+    entry.readers -= 1;
+    if (entry.readers === 0) inflight.delete(id);
+  }
+  if (rows.length === 0) return null;
+
+  const { family_json, payments_json, summary_json, kyc_json, ...user } = rows[0];
+  // JSON_ARRAYAGG does not keep the derived table's order; restore newest-first here.
+  const payments = (jsonColumn(payments_json) || [])
+    .map((p) => ({ ...p, payment_date: jsonDate(p.payment_date) }))
+    .sort((a, b) => b.payment_date - a.payment_date || b.id - a.id);
+  const hasMore = payments.length > PROFILE_PAYMENTS_PAGE;
+  const page = hasMore ? payments.slice(0, PROFILE_PAYMENTS_PAGE) : payments;
+  const last = page[page.length - 1];
+  const profile = {
+    user,
+    familyMembers: (jsonColumn(family_json) || []).map((f) => ({ ...f, dob: jsonDate(f.dob) })),
+    payments: page.map(({ id: rowId, ...p }) => p),
+    paymentsNextCursor: hasMore ? encodeKeysetCursor(last.payment_date, last.id) : null,
+    paymentSummary: summarizePayments(jsonColumn(summary_json) || []),
+    kycDocuments: jsonColumn(kyc_json) || null,
+  };
+  if (entry.gen !== gen) return profile;
+  return profileCache.set(id, profile);
+}
+
+/** Sends `payload` as JSON with a content ETag, answering 304 when the client already has it. */
+export function sendWithEtag(req, res, payload) {
+  const body = JSON.stringify(payload);
+  res.set('ETag', `"${createHash('sha1').update(body).digest('base64url')}"`);
+  res.set('Cache-Control', 'private, no-cache');
+  if (req.fresh) return res.status(304).end();
+  res.type('json').send(body);
+}